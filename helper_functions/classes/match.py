@@ -44,35 +44,60 @@ class Match:
     def from_dataframe_entry(
         cls, df_entry: pd.Series, all_subteams: dict[str, Subteam], silent: bool = False
     ) -> Match:
-        sport = df_entry["sport"]
-        key_a = df_entry["team_a_key"].replace(": ", "")
-        key_b = df_entry["team_b_key"].replace(": ", "")
-        full_subkey_a = sport + "_" + key_a
-        full_subkey_b = sport + "_" + key_b
-        duration = timedelta(seconds=df_entry["duration"])
-        if sport in ["ping_pong", "tennis", "chess"]:
-            default_a = Subteam(sport, key_a[0], key_a[1:], [])
-            default_b = Subteam(sport, key_b[0], key_b[1:], [])
-            subteam_a = all_subteams.get(full_subkey_a, default_a)
-            subteam_b = all_subteams.get(full_subkey_b, default_b)
-        else:
-            subteam_a = all_subteams[full_subkey_a]
-            subteam_b = all_subteams[full_subkey_b]
+        return cls.from_dataframe(df_entry.to_frame().T, all_subteams, silent)[0]
+
+    @classmethod
+    def from_dataframe(
+        cls, df: pd.DataFrame, all_subteams: dict[str, Subteam], silent: bool = False
+    ) -> list[Match]:
+        """Create the matches for all entries of a match dataframe at once."""
+        if len(df) == 0:
+            return []
+        sports = df["sport"]
+        keys_a = df["team_a_key"].str.replace(": ", "")
+        keys_b = df["team_b_key"].str.replace(": ", "")
+        # Single player sports may refer to subteams that have dropped out entirely
+        allow_default = sports.isin(["ping_pong", "tennis", "chess"]).tolist()
+        durations = pd.to_timedelta(df["duration"], unit="s").dt.to_pytimedelta()
+        subteams_ab = []
+        for keys in (keys_a, keys_b):
+            full_keys = (sports + "_" + keys).tolist()
+            subteams = [all_subteams.get(key) for key in full_keys]
+            for i in [i for i, subteam in enumerate(subteams) if subteam is None]:
+                if not allow_default[i]:
+                    raise KeyError(full_keys[i])
+                key = keys.iat[i]
+                subteams[i] = Subteam(sports.iat[i], key[0], key[1:], [])
+            subteams_ab.append(subteams)
+        matches = [
+            cls(
+                sport=sport,
+                start=start,
+                duration=duration,
+                subteam_a=subteam_a,
+                subteam_b=subteam_b,
+                location=location,
+                result=result,
+                winner=winner,
+            )
+            for sport, start, duration, subteam_a, subteam_b, location, result, winner in zip(
+                sports.tolist(),
+                df["start"].tolist(),
+                durations,
+                *subteams_ab,
+                df["location"].tolist(),
+                df["result"].tolist(),
+                df["winner"].tolist(),
+            )
+        ]
         if not silent:
-            if len(subteam_a.players) == 0:
-                LOGGER.debug(f"For match {sport}: {key_a}: No player found")
-            if len(subteam_b.players) == 0:
-                LOGGER.debug(f"For match {sport}: {key_b}: No player found")
-        return cls(
-            sport=sport,
-            start=df_entry["start"],
-            duration=duration,
-            subteam_a=subteam_a,
-            subteam_b=subteam_b,
-            location=df_entry["location"],
-            result=df_entry["result"],
-            winner=df_entry["winner"],
-        )
+            for match_ in matches:
+                for subteam in (match_.subteam_a, match_.subteam_b):
+                    if len(subteam.players) == 0:
+                        LOGGER.debug(
+                            f"For match {match_.sport}: {subteam.short_key}: No player found"
+                        )
+        return matches
 
     @property
     def as_series(self) -> pd.Series:
@@ -224,14 +249,16 @@ class Match:
         return self.start - delta, self.end + delta
 
     def switch_with_other(self, other: Match):
-        """Switch this match with another one."""
+        """Switch this match with another one, without checking for collisions
+        (see `RescheduleSession.swap` for that)."""
         assert self.sport == other.sport, "Can only switch matches of the same sport"
         self.location, other.location = other.location, self.location
         self.start, other.start = other.start, self.start
         LOGGER.info(f"Switched {self.match_key} with {other.match_key}")
 
     def set_time_and_loc(self, hour: int, minute: int, loc: str):
-        """Set a new time and location for this event."""
+        """Set a new time and location for this event, without checking for
+        collisions (see `RescheduleSession.move` for that)."""
         assert 17 <= hour <= 22
         self.start = datetime.combine(self.start.date(), time(hour, minute))
         self.location = loc
@@ -12,6 +12,7 @@ from ..constants import ALL_DAYS, SPORTS_LIST, FpathRegistry
 from .match import Match
 
 if TYPE_CHECKING:
+    from .player_index import PlayerIndex
     from .sport_event import SportEvent
 
 
@@ -48,7 +49,15 @@ class Player:
     """The confirmation status; has this player replied to the schedule email?"""
 
     @classmethod
-    def from_series(cls, series: pd.Series, all_matches: list[Match]) -> Player:
+    def from_series(
+        cls,
+        series: pd.Series,
+        all_matches: list[Match],
+        player_index: PlayerIndex | None = None,
+    ) -> Player:
+        """Create a player from their row in the player dataframe.
+        If a player index is given, their matches are looked up there instead of
+        searching through all matches."""
         name = series["nickname"]
         avail_days = [
             day for day in ALL_DAYS if day in series and series[f"avail_{day}"]
@@ -67,8 +76,11 @@ class Player:
                 if f"subteam_{sport}" in series
                 and (subteam := series.fillna("")[f"subteam_{sport}"]) != ""
             }
-        matches = [match_ for match_ in all_matches if match_.contains_player(name)]
-        matches = sorted(matches, key=lambda match_: match_.start)
+        if player_index is not None:
+            matches = player_index.get_matches(name)
+        else:
+            matches = [m for m in all_matches if m.contains_player(name)]
+            matches = sorted(matches, key=lambda match_: match_.start)
         return cls(
             nickname=name,
             avail_days=avail_days,
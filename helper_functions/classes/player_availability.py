@@ -0,0 +1,254 @@
+from __future__ import annotations
+
+import ast
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import TYPE_CHECKING, Iterable
+
+import numpy as np
+import pandas as pd
+
+from ..constants import ALL_DAYS, SPORTS_LIST
+
+if TYPE_CHECKING:
+    from .match import Match
+    from .subteam import Subteam
+
+SLOT_MINUTES = 15
+"""The length of the time slots of the availability grid."""
+
+FIRST_HOUR = 8
+"""The hour of the day at which the first slot of the availability grid starts."""
+
+NUM_SLOTS = (24 - FIRST_HOUR) * 60 // SLOT_MINUTES
+"""The number of slots per day in the availability grid."""
+
+
+def parse_list_column(days: str | list[str] | float) -> list[str]:
+    """Parse an entry of a column of lower case day or sport names, as it is still
+    the string representation of a list after reading the csv."""
+    if isinstance(days, str):
+        days = ast.literal_eval(days) if days.startswith("[") else [days]
+    if not isinstance(days, list):
+        return []
+    return [day.lower() for day in days]
+
+
+def get_sport_bits(players: pd.DataFrame, exclude_dropouts: bool = False) -> np.ndarray:
+    """Encode the sports each player signed up for as one integer per player,
+    with the i-th bit set for the i-th sport of the `SPORTS_LIST`."""
+    bits = np.zeros(len(players), dtype=np.int64)
+    for i, sport in enumerate(SPORTS_LIST):
+        if sport in players.columns:
+            signed_up = players[sport].fillna(False).to_numpy(dtype=bool)
+            bits |= signed_up.astype(np.int64) << i
+    if exclude_dropouts and "dropout_sports" in players.columns:
+        for row, sports in enumerate(players["dropout_sports"]):
+            for sport in parse_list_column(sports):
+                if sport in SPORTS_LIST:
+                    bits[row] &= ~(1 << SPORTS_LIST.index(sport))
+    return bits
+
+
+def has_sport(sport_bits: np.ndarray, sport: str) -> np.ndarray:
+    """Whether the players of the given sport bits signed up for the sport."""
+    return (sport_bits >> SPORTS_LIST.index(sport)) & 1 == 1
+
+
+def get_slot_range(start: datetime, end: datetime) -> tuple[int, slice] | None:
+    """The day index and the slots of the grid covered by the given time span,
+    or None if it is on a weekend or ends before the first slot.
+    The span is rounded out to whole slots, so the grid may count a player as busy
+    in the slot right before or after a match that does not fill it."""
+    day = start.weekday()
+    if day >= len(ALL_DAYS):
+        return None
+    first_start = start.replace(hour=FIRST_HOUR, minute=0, second=0, microsecond=0)
+    first = int((start - first_start).total_seconds() // (SLOT_MINUTES * 60))
+    last = -int(-(end - first_start).total_seconds() // (SLOT_MINUTES * 60))
+    if last <= 0:
+        return None
+    return day, slice(max(first, 0), min(max(last, first + 1), NUM_SLOTS))
+
+
+@dataclass
+class PlayerAvailability:
+    """The availability of all players as arrays, for fast lookups when scheduling.
+    The week is split into a grid of days and short time slots, and a player is free
+    in a slot if they are available on that day and not taking part in any match.
+    It is built once per data snapshot, so changes to the matches are only reflected
+    after reloading the data (or when blocking them via `add_match`)."""
+
+    nicknames: list[str] = field(repr=False)
+    """The nickname of each player, in the order of the rows of the arrays."""
+
+    available_days: np.ndarray = field(repr=False)
+    """Whether each player is available on each day, shape (players, days)."""
+
+    ping_pong_days: np.ndarray = field(repr=False)
+    """Whether each player wants to play ping pong on each day."""
+
+    num_busy: np.ndarray = field(repr=False)
+    """The number of matches each player plays in each slot,
+    shape (players, days, slots)."""
+
+    sport_bits: np.ndarray = field(repr=False)
+    """The sports of each player without those they dropped out of,
+    see `get_sport_bits`."""
+
+    _index: dict[str, int] = field(default_factory=dict, repr=False)
+    """Maps each nickname to its row in the arrays."""
+
+    def __post_init__(self):
+        self._index = {name: i for i, name in enumerate(self.nicknames)}
+
+    @classmethod
+    def from_data(
+        cls, players: pd.DataFrame, matches: Iterable[Match] = ()
+    ) -> PlayerAvailability:
+        nicknames = players["nickname"].tolist()
+        available_days = np.ones((len(players), len(ALL_DAYS)), dtype=bool)
+        for i, day in enumerate(ALL_DAYS):
+            if f"avail_{day}" in players.columns:
+                available_days[:, i] = (
+                    players[f"avail_{day}"].fillna(False).to_numpy(dtype=bool)
+                )
+        ping_pong_days = np.zeros((len(players), len(ALL_DAYS)), dtype=bool)
+        if "ping_pong_days" in players.columns:
+            for row, days in enumerate(players["ping_pong_days"]):
+                for day in parse_list_column(days):
+                    ping_pong_days[row, ALL_DAYS.index(day)] = True
+        availability = cls(
+            nicknames,
+            available_days,
+            ping_pong_days,
+            np.zeros((len(players), len(ALL_DAYS), NUM_SLOTS), dtype=np.int16),
+            get_sport_bits(players, exclude_dropouts=True),
+        )
+        for match_ in matches:
+            availability.add_match(match_)
+        return availability
+
+    def get_rows(self, nicknames: Iterable[str]) -> np.ndarray:
+        """The rows of the given players, skipping those that are not known."""
+        return np.array(
+            [self._index[name] for name in nicknames if name in self._index],
+            dtype=int,
+        )
+
+    def add_match(self, match_: Match, num: int = 1):
+        """Mark the players of the given match as busy during it
+        (or as free again for a negative `num`)."""
+        slot_range = get_slot_range(match_.start, match_.end)
+        if slot_range is None:
+            return
+        day, slots = slot_range
+        rows = self.get_rows(dict.fromkeys(match_.involved_players))
+        self.num_busy[rows, day, slots] += num
+
+    def get_free_mask(
+        self, start: datetime, end: datetime, ignore: Match | None = None
+    ) -> np.ndarray:
+        """Whether each player is available and not playing between start and end,
+        not counting the given match (e.g. the one the query is about)."""
+        slot_range = get_slot_range(start, end)
+        if slot_range is None:
+            return np.ones(len(self.nicknames), dtype=bool)
+        day, slots = slot_range
+        num_busy = self.num_busy[:, day, slots].max(axis=1)
+        if ignore is not None:
+            # Only the players of the ignored match can be busy with it
+            rows = self.get_rows(dict.fromkeys(ignore.involved_players))
+            ignore_range = get_slot_range(ignore.start, ignore.end)
+            if ignore_range is not None and ignore_range[0] == day:
+                busy = self.num_busy[rows, day].copy()
+                busy[:, ignore_range[1]] -= 1
+                num_busy[rows] = busy[:, slots].max(axis=1)
+        return self.available_days[:, day] & (num_busy <= 0)
+
+    def is_free(self, nickname: str, start: datetime, end: datetime) -> bool:
+        """Whether the given player is free between start and end."""
+        return bool(self.get_free_mask(start, end)[self._index[nickname]])
+
+    def get_free_players(
+        self,
+        start: datetime,
+        end: datetime,
+        candidates: Iterable[str] | None = None,
+    ) -> list[str]:
+        """The players (out of the candidates, if given) free between start and end."""
+        free = self.get_free_mask(start, end)
+        if candidates is None:
+            return [name for name, is_free in zip(self.nicknames, free) if is_free]
+        return [
+            name
+            for name in candidates
+            if name in self._index and free[self._index[name]]
+        ]
+
+    def get_conflicting_players(
+        self,
+        subteam: Subteam,
+        start: datetime,
+        end: datetime,
+        ignore: Match | None = None,
+    ) -> list[str]:
+        """The players of the given subteam that are not free between start and end,
+        not counting the given match."""
+        free = self.get_free_mask(start, end, ignore)
+        return [
+            name
+            for name in subteam.players
+            if name in self._index and not free[self._index[name]]
+        ]
+
+    def get_available_reserves(
+        self, match_: Match, reserves: Iterable[Subteam]
+    ) -> dict[str, list[str]]:
+        """The players of the given reserve subteams that are free during the match,
+        for each team letter of the match."""
+        free = self.get_free_mask(match_.start, match_.end, ignore=match_)
+        sport_mask = self.get_sport_mask(match_.sport)
+        letters = [match_.subteam_a.main_team_letter, match_.subteam_b.main_team_letter]
+        available: dict[str, list[str]] = {letter: [] for letter in letters}
+        for subteam in reserves:
+            letter = subteam.main_team_letter
+            if subteam.sport != match_.sport or letter not in available:
+                continue
+            available[letter] += [
+                name
+                for name in subteam.players
+                if name in self._index
+                and free[self._index[name]]
+                and sport_mask[self._index[name]]
+                and name not in match_.involved_players
+            ]
+        return available
+
+    def get_sport_mask(
+        self, sport: str, days: Iterable[str] | None = None
+    ) -> np.ndarray:
+        """Whether each player signed up for the given sport (and has not dropped out
+        of it), optionally only if they are available on any of the given days."""
+        mask = has_sport(self.sport_bits, sport)
+        if days is not None:
+            day_rows = [ALL_DAYS.index(day) for day in days]
+            mask &= self.available_days[:, day_rows].any(axis=1)
+        return mask
+
+    def get_players_for_sport(
+        self, sport: str, days: Iterable[str] | None = None
+    ) -> list[str]:
+        """The players signed up for the given sport, see `get_sport_mask`."""
+        mask = self.get_sport_mask(sport, days)
+        return [name for name, is_in in zip(self.nicknames, mask) if is_in]
+
+    def get_busy_days(self, nickname: str) -> set[str]:
+        """The days the given player takes part in any match on."""
+        row = self.num_busy[self._index[nickname]].any(axis=1)
+        return {day for day, is_busy in zip(ALL_DAYS, row) if is_busy}
+
+    def get_ping_pong_days(self, nickname: str) -> set[str]:
+        """The days the given player wants to play ping pong on."""
+        row = self.ping_pong_days[self._index[nickname]]
+        return {day for day, is_in in zip(ALL_DAYS, row) if is_in}
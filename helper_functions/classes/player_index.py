@@ -0,0 +1,42 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+
+from .match import Match
+from .subteam import Subteam
+
+
+@dataclass
+class PlayerIndex:
+    """Inverted index mapping each player's nickname to the matches and subteams
+    they are part of.
+    It is built once per data snapshot, so changes to the subteams are only
+    reflected after reloading the data."""
+
+    matches: dict[str, list[Match]] = field(default_factory=dict, repr=False)
+    """The matches of each player, sorted by their start time."""
+
+    subteams: dict[str, list[Subteam]] = field(default_factory=dict, repr=False)
+    """The subteams (including reserves and dropouts) of each player."""
+
+    @classmethod
+    def from_data(
+        cls, subteams: dict[str, Subteam], matches: list[Match]
+    ) -> PlayerIndex:
+        index = cls()
+        for subteam in subteams.values():
+            for player in subteam.players:
+                index.subteams.setdefault(player, []).append(subteam)
+        for match_ in sorted(matches, key=lambda match_: match_.start):
+            # dict.fromkeys to not register a match twice for the same player
+            for player in dict.fromkeys(match_.involved_players):
+                index.matches.setdefault(player, []).append(match_)
+        return index
+
+    def get_matches(self, nickname: str) -> list[Match]:
+        """The matches the given player takes part in, sorted by their start time."""
+        return list(self.matches.get(nickname, []))
+
+    def get_subteams(self, nickname: str) -> list[Subteam]:
+        """The subteams the given player is part of."""
+        return self.subteams.get(nickname, [])
@@ -0,0 +1,223 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING
+
+import numpy as np
+import pandas as pd
+
+from .match import Match
+
+if TYPE_CHECKING:
+    from ..data_registry import DataRegistry
+
+_TIE_KEYS = ["AB", "AC", "BC"]
+
+
+@dataclass
+class ScoreBoard:
+    """The team and individual scores of a year, computed from all matches at once.
+    The scores are kept in memory, so when reloading after entering the results of
+    a few matches, only the scores of the affected teams and players are updated."""
+
+    data: DataRegistry = field(repr=False)
+    """The registry the matches and events are taken from."""
+
+    team_scores: pd.DataFrame = field(repr=False)
+    """The points (wins plus half the ties) of each team (index) for each sport (columns)."""
+
+    match_progress: pd.DataFrame = field(repr=False)
+    """The total number of matches and the number of matches with a winner for each sport."""
+
+    player_scores: pd.Series = field(repr=False)
+    """The individual score of each player, see `ScoreBoard.get_match_player_values`."""
+
+    _matches: dict[str, Match] = field(default_factory=dict, repr=False)
+    """The matches the scores are based on, by their key."""
+
+    _fingerprint: tuple = field(default=(), repr=False)
+    """Everything besides the match results the scores depend on."""
+
+    @classmethod
+    def from_data(cls, data: DataRegistry) -> ScoreBoard:
+        matches = [m for m in data.matches if m.sport in data.sport_events]
+        match_table = pd.DataFrame(
+            {
+                "sport": [m.sport for m in matches],
+                "winner": [m.winner for m in matches],
+            },
+            dtype=object,
+        )
+        sports = data.avail_sports
+        team_letters = data.team_letters
+        winners = match_table["winner"].astype(str)
+        is_tie = winners.str.len() > 1
+        points = pd.DataFrame(
+            {
+                letter: (winners == letter)
+                + 0.5 * (is_tie & winners.str.contains(letter, regex=False))
+                for letter in team_letters
+            }
+        )
+        points["sport"] = match_table["sport"]
+        team_scores = (
+            points.groupby("sport")
+            .sum()
+            .T.reindex(index=team_letters, columns=sports, fill_value=0.0)
+            .astype(float)
+        )
+        for letter in team_letters:
+            sprint_score = data.get_running_sprints_score(letter)
+            team_scores.loc[letter, "running_sprints"] = sprint_score
+        match_progress = pd.DataFrame(
+            {
+                "num_total": match_table.groupby("sport").size(),
+                "num_done": (winners != "").groupby(match_table["sport"]).sum(),
+            }
+        ).reindex(sports, fill_value=0)
+
+        # One row per player and match, with the side (0 or 1) they are playing on
+        player_table = pd.DataFrame(
+            [
+                (i, player, side)
+                for i, match_ in enumerate(matches)
+                for side, subteam in enumerate((match_.subteam_a, match_.subteam_b))
+                for player in subteam.players
+            ],
+            columns=["match", "player", "side"],
+        ).astype({"match": int, "side": int})
+        letters = np.array(
+            [
+                (m.subteam_a.main_team_letter, m.subteam_b.main_team_letter)
+                for m in matches
+            ],
+            dtype=object,
+        ).reshape(-1, 2)
+        win_values = (
+            match_table["sport"]
+            .map(lambda sport: data.sport_events[sport].single_match_win_value)
+            .to_numpy(dtype=float)
+        )
+        # Same as `Match.winning_players`, the first subteam with the winning letter wins
+        winning_side = np.where(
+            winners == letters[:, 0], 0, np.where(winners == letters[:, 1], 1, -1)
+        )
+        winning_side[~winners.isin(["A", "B", "C"]).to_numpy()] = -1
+        row_match = player_table["match"].to_numpy()
+        player_table["value"] = np.where(
+            winning_side[row_match] == player_table["side"].to_numpy(),
+            win_values[row_match],
+            np.where(
+                winners.isin(_TIE_KEYS).to_numpy()[row_match],
+                win_values[row_match] / 2,
+                0.0,
+            ),
+        )
+        player_scores = player_table.groupby("player")["value"].sum()
+        sprint_scores = pd.Series(
+            {
+                player: data.get_running_sprints_score(letter)
+                / data.sport_events["running_sprints"].num_players_per_subteam
+                for letter in team_letters
+                for player in data.subteams[f"running_sprints_{letter}1"].players
+            },
+            dtype=float,
+        )
+        player_scores = player_scores.add(sprint_scores, fill_value=0.0)
+        return cls(
+            data,
+            team_scores,
+            match_progress,
+            player_scores,
+            {m.match_key: m for m in matches},
+            cls._get_fingerprint(data),
+        )
+
+    @staticmethod
+    def _get_fingerprint(data: DataRegistry) -> tuple:
+        return (
+            tuple(data.team_letters),
+            tuple(
+                (sport, event.single_match_win_value)
+                for sport, event in data.sport_events.items()
+            ),
+            tuple((key, tuple(s.players)) for key, s in data.subteams.items()),
+        )
+
+    def get_team_score(self, team_letter: str, sport: str) -> float:
+        """The points the given team has scored for the given sport."""
+        return float(self.team_scores.loc[team_letter, sport])
+
+    def get_player_score(self, nickname: str) -> float:
+        """The individual score of the given player."""
+        return float(self.player_scores.get(nickname, 0.0))
+
+    def get_match_team_points(self, match_: Match) -> dict[str, float]:
+        """The points each team gets for the given match."""
+        winner = str(match_.winner)
+        return {
+            letter: float(winner == letter)
+            + 0.5 * (len(winner) > 1 and letter in winner)
+            for letter in self.team_scores.index
+        }
+
+    def get_match_player_values(self, match_: Match) -> dict[str, float]:
+        """The individual score each player gets for the given match."""
+        win_val = self.data.sport_events[match_.sport].single_match_win_value
+        values: dict[str, float] = {}
+        for player in match_.winning_players:
+            values[player] = values.get(player, 0.0) + win_val
+        for player in match_.tying_players:
+            values[player] = values.get(player, 0.0) + win_val / 2
+        return values
+
+    def _add_match(self, match_: Match, sign: int):
+        # The team score for the running sprints is not determined by matches
+        if match_.sport != "running_sprints":
+            for letter, points in self.get_match_team_points(match_).items():
+                self.team_scores.loc[letter, match_.sport] += sign * points
+        self.match_progress.loc[match_.sport, "num_done"] += sign * (
+            match_.winner != ""
+        )
+        for player, value in self.get_match_player_values(match_).items():
+            self.player_scores[player] = (
+                self.player_scores.get(player, 0.0) + sign * value
+            )
+
+    def update_match(self, match_: Match):
+        """Replace the previous version of the given match (e.g. after reloading it
+        with a new winner), updating only the scores of the teams and players
+        involved."""
+        self._add_match(self._matches[match_.match_key], -1)
+        self._add_match(match_, 1)
+        self._matches[match_.match_key] = match_
+
+    def update_matches(self, matches: list[Match]) -> bool:
+        """Take over the given (reloaded) matches, only updating the scores for
+        those whose winner has changed.
+
+        Returns
+        -------
+        bool
+            Whether the scores could be updated. This is not the case if anything
+            else they depend on has changed, e.g. matches were added or the
+            subteams changed, so the score board needs to be built anew.
+        """
+        new = {m.match_key: m for m in matches if m.sport in self.data.sport_events}
+        if new.keys() != self._matches.keys():
+            return False
+        if self._get_fingerprint(self.data) != self._fingerprint:
+            return False
+        if any(
+            m.sport != self._matches[key].sport
+            or m.subteam_a.short_key != self._matches[key].subteam_a.short_key
+            or m.subteam_b.short_key != self._matches[key].subteam_b.short_key
+            for key, m in new.items()
+        ):
+            return False
+        for key, match_ in new.items():
+            if match_.winner != self._matches[key].winner:
+                self.update_match(match_)
+            else:
+                self._matches[key] = match_
+        return True
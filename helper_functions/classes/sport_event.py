@@ -104,10 +104,10 @@ def _st_display_match_df(
     )
     if only_one_player_per_team:
         df["team_a_av"] = df["team_a"].apply(
-            lambda x: FpathRegistry.get_animal_pic_path(x[3:])
+            lambda x: FpathRegistry.get_animal_pic_path(x[3:], variant="table")
         )
         df["team_b_av"] = df["team_b"].apply(
-            lambda x: FpathRegistry.get_animal_pic_path(x[3:])
+            lambda x: FpathRegistry.get_animal_pic_path(x[3:], variant="table")
         )
         column_configs["team_a_av"] = st.column_config.ImageColumn("Avatar a")
         column_configs["team_b_av"] = st.column_config.ImageColumn("Avatar b")
@@ -139,7 +139,11 @@ def _st_display_subteam_df(df: pd.DataFrame, data: DataRegistry):
     column_configs = {"full_key": st.column_config.Column("Subteam", width="small")}
     for i in range(max(df["players"].apply(len))):
         df[f"avatar_{i}"] = df["players"].apply(
-            lambda x: FpathRegistry.get_animal_pic_path(x[i]) if i < len(x) else ""
+            lambda x: (
+                FpathRegistry.get_animal_pic_path(x[i], variant="table")
+                if i < len(x)
+                else ""
+            )
         )
         column_configs[f"avatar_{i}"] = st.column_config.ImageColumn("")
     column_configs["players"] = st.column_config.ListColumn("Players")
@@ -233,11 +237,15 @@ class SportEvent:
     (needed for associated match and subteam loading)."""
 
     conflicting_sports: list[str] = field(default_factory=list)
-    """Any other sports overlapping with this one."""
+    """Any other sports declared to be conflicting with this one.
+    Sports overlapping in time are found automatically, see `get_conflict_graph`."""
 
     requirements: list[str] = field(default_factory=list)
     """Any tools that are neccessary to participate."""
 
+    notes: list[str] = field(default_factory=list)
+    """Announcements shown above the matches, e.g. about cancelled matches."""
+
     subteams: list[Subteam] = field(default_factory=list, repr=False)
     """The sub-teams for this sport."""
 
@@ -247,6 +255,13 @@ class SportEvent:
     days: list[str] = field(init=False)
     """The days this sport takes place on."""
 
+    _sub_team_df: pd.DataFrame | None = field(
+        default=None, init=False, repr=False, compare=False
+    )
+    _match_df: pd.DataFrame | None = field(
+        default=None, init=False, repr=False, compare=False
+    )
+
     def __post_init__(self):
         assert self.start < self.end, "The start time must be before the end time."
         assert (self.sanitized_name == "running_sprints") or (
@@ -261,17 +276,9 @@ class SportEvent:
             for day in pd.date_range(self.start, self.end).date
             # if day.strftime("%A").lower() != "wednesday"
         ]
-        self.subteams = [
-            subteam
-            for subteam in get_data_for_year(self.year).subteams.values()
-            if subteam.sport == self.sanitized_name
-        ]
-        matches = [
-            m
-            for m in get_data_for_year(self.year).matches
-            if m.sport == self.sanitized_name
-        ]
-        self.matches = sorted(matches, key=lambda m: m.start)
+        sport_index = get_data_for_year(self.year).sport_index
+        self.subteams = sport_index.get_subteams(self.sanitized_name)
+        self.matches = sport_index.get_matches(self.sanitized_name)
 
     @classmethod
     def from_dict(
@@ -309,6 +316,19 @@ class SportEvent:
         sorting the sports by appearance."""
         return f"{SPORTS_LIST.index(self.sanitized_name):0>2}"
 
+    @property
+    def time_windows(self) -> list[tuple[datetime, datetime]]:
+        """The windows this sport takes place in, one per day for multi-day events."""
+        if self.start.date() == self.end.date():
+            return [(self.start, self.end)]
+        return [
+            (
+                datetime.combine(day, self.start.time()),
+                datetime.combine(day, self.end.time()),
+            )
+            for day in pd.date_range(self.start.date(), self.end.date()).date
+        ]
+
     @property
     def calendar_entries(self) -> list[dict[str, str | dict]]:
         """The calendar entries with the general timeline for this sport."""
@@ -388,11 +408,28 @@ class SportEvent:
 
     @property
     def sub_team_df(self) -> pd.DataFrame:
-        return turn_series_list_to_dataframe([team.as_series for team in self.subteams])
+        """The subteams of this sport as a dataframe.
+        It is cached on the event, which is recreated when the data is reloaded."""
+        if self._sub_team_df is None:
+            self._sub_team_df = turn_series_list_to_dataframe(
+                [team.as_series for team in self.subteams]
+            )
+        return self._sub_team_df.copy()
 
     @property
     def match_df(self) -> pd.DataFrame:
-        return turn_series_list_to_dataframe([m.as_series for m in self.matches])
+        """The matches of this sport as a dataframe.
+        It is cached on the event, which is recreated when the data is reloaded."""
+        if self._match_df is None:
+            self._match_df = turn_series_list_to_dataframe(
+                [m.as_series for m in self.matches]
+            )
+        return self._match_df.copy()
+
+    def clear_cache(self):
+        """Clear the cached dataframes, e.g. after changing matches in place."""
+        self._sub_team_df = None
+        self._match_df = None
 
     @property
     def single_match_win_value(self) -> float:
@@ -449,10 +486,8 @@ class SportEvent:
 
     def _st_display_matches(self):
 
-        if self.sanitized_name in ["basketball", "volleyball"]:
-            st.write(
-                "⚠️Due to the rain, the Monday matches have been cancelled. Instead, there were free-to-join matches on Friday, starting at 17:30. If you want to join, just stop by! You won't need to be part of any subteam."
-            )
+        for note in self.notes:
+            st.write(f"⚠️{note}")
         if self.sanitized_name == "running_sprints":
             fpath = FpathRegistry.get_path_running_sprints(self.year)
             if not fpath.exists():
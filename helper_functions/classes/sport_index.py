@@ -0,0 +1,39 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+
+from .match import Match
+from .subteam import Subteam
+
+
+@dataclass
+class SportIndex:
+    """Index grouping the subteams and matches of a year by their sport.
+    It is built once per data snapshot instead of each event filtering all subteams
+    and matches. The lookups hand out copies of the lists, so the index can't be
+    changed through them."""
+
+    subteams: dict[str, list[Subteam]] = field(default_factory=dict, repr=False)
+    """The subteams of each sport, in the order they were loaded."""
+
+    matches: dict[str, list[Match]] = field(default_factory=dict, repr=False)
+    """The matches of each sport, sorted by their start time."""
+
+    @classmethod
+    def from_data(
+        cls, subteams: dict[str, Subteam], matches: list[Match]
+    ) -> SportIndex:
+        index = cls()
+        for subteam in subteams.values():
+            index.subteams.setdefault(subteam.sport, []).append(subteam)
+        for match_ in sorted(matches, key=lambda match_: match_.start):
+            index.matches.setdefault(match_.sport, []).append(match_)
+        return index
+
+    def get_subteams(self, sport: str) -> list[Subteam]:
+        """The subteams of the given sport."""
+        return list(self.subteams.get(sport, []))
+
+    def get_matches(self, sport: str) -> list[Match]:
+        """The matches of the given sport, sorted by their start time."""
+        return list(self.matches.get(sport, []))
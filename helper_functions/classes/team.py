@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import warnings
 from dataclasses import dataclass, field
 from pathlib import Path
 from typing import TYPE_CHECKING, Any, Literal
@@ -11,6 +12,7 @@ import streamlit as st
 from ..constants import CURRENT_YEAR, SPORTS_LIST, FpathRegistry
 from ..logger import LOGGER
 from ..util import write_changelog_entry
+from .player_availability import get_sport_bits, has_sport
 
 if TYPE_CHECKING:
     from .subteam import Subteam
@@ -41,8 +43,24 @@ class Team:
     )
     """Rough estimate for how well this team fulfills the requirements for each of the sports."""
 
-    _players: list[pd.Series] = field(default_factory=list)
-    """The list of players in the team."""
+    _player_store: pd.DataFrame = field(
+        default_factory=pd.DataFrame, repr=False, compare=False
+    )
+    """The columnar store of the players in the team, one row per player."""
+
+    _pending_players: list[dict[str, Any]] = field(
+        default_factory=list, repr=False, compare=False
+    )
+    """Players added since the store was last built, appended to it on the next read."""
+
+    _nickname_index: dict[str, int] = field(
+        default_factory=dict, repr=False, compare=False
+    )
+    """Maps each player's nickname to their row in the player store."""
+
+    _sport_bits: np.ndarray | None = field(default=None, repr=False, compare=False)
+    """The sports of each player in the store (see `get_sport_bits`), built on the
+    first sport query after the store has changed."""
 
     colors = ["#FF0000", "#0000FF", "#008000", "#FFFF00", "#800080"]
 
@@ -50,13 +68,30 @@ class Team:
         self.color = Team.colors[self.team_index % len(Team.colors)]
 
     def __len__(self):
-        return len(self._players)
+        return len(self._player_store) + len(self._pending_players)
 
     @classmethod
     def from_backup(cls, team_index: int, year=CURRENT_YEAR) -> Team:
         fpath = cls.backup_path(team_index, year)
         if not fpath.exists():
             raise FileNotFoundError(f"No backup found for team {team_index}.")
+        return cls.from_dataframe(team_index, cls.read_backup(fpath))
+
+    @classmethod
+    def from_dataframe(cls, team_index: int, players: pd.DataFrame) -> Team:
+        """Create a team from an already loaded player dataframe."""
+        team = cls(
+            team_index=team_index,
+            sports_fulfill_nums={
+                sport: 0 for sport in SPORTS_LIST if sport in players.columns
+            },
+        )
+        team.set_players(players)
+        return team
+
+    @staticmethod
+    def read_backup(fpath: Path) -> pd.DataFrame:
+        """Read the player dataframe of a team backup, restoring the subteam keys as strings."""
         players = pd.read_csv(fpath)
         for subteam_col in [col for col in players.columns if "subteam" in col]:
             players[subteam_col] = (
@@ -71,15 +106,7 @@ class Team:
         for col in ["dropout_sports"]:
             if col in players.columns:
                 players[col] = players[col].apply(eval)
-
-        team = cls(
-            team_index=team_index,
-            sports_fulfill_nums={
-                sport: 0 for sport in SPORTS_LIST if sport in players.columns
-            },
-        )
-        team.set_players(players)
-        return team
+        return players
 
     @staticmethod
     def backup_path(team_index: int, year=CURRENT_YEAR) -> Path:
@@ -88,7 +115,7 @@ class Team:
 
     @property
     def player_num(self) -> int:
-        return len(self._players)
+        return len(self)
 
     @property
     def name(self) -> str:
@@ -100,10 +127,8 @@ class Team:
 
     @property
     def player_df(self) -> pd.DataFrame:
-        df = pd.DataFrame(self._players)
         # Do not use fillna("") here as this will break things!
-        df["Team"] = self.name
-        return df
+        return self._get_player_store().copy()
 
     @property
     def current_sports_stats(self) -> dict[str, int]:
@@ -120,6 +145,27 @@ class Team:
     def __str__(self):
         return f"{self.name} ({self.player_num} players): {self.sports_fulfill_nums}"
 
+    def _get_player_store(self) -> pd.DataFrame:
+        """Return the player store, first appending any players added since the last read."""
+        if len(self._pending_players) > 0:
+            new_players = pd.DataFrame(self._pending_players)
+            self._pending_players = []
+            self._sport_bits = None
+            self._player_store = (
+                pd.concat([self._player_store, new_players], ignore_index=True)
+                if len(self._player_store) > 0
+                else new_players
+            )
+            self._player_store["Team"] = self.name
+        elif "Team" not in self._player_store.columns:
+            self._player_store["Team"] = self.name
+        return self._player_store
+
+    def _rebuild_nickname_index(self):
+        self._nickname_index = {
+            name: i for i, name in enumerate(self._player_store.get("nickname", []))
+        }
+
     def change_player_attribute(
         self, player_name: str, attr: str, value: Any, not_exist_okay=False
     ):
@@ -131,12 +177,20 @@ class Team:
                 f"Player {player_name} not in team {self.team_letter}. Cannot change attribute."
             )
             return
-        idx = np.where([p["nickname"] == player_name for p in self._players])[0][0]
-        player = self._players[idx]
-        if attr not in player:
+        store = self._get_player_store()
+        if attr not in store.columns:
             raise KeyError(f"Attribute {attr} not found in player {player_name}.")
-        player[attr] = value
-        self._players[idx] = player
+        if attr in SPORTS_LIST:
+            self._sport_bits = None
+        row = self._nickname_index[player_name]
+        try:
+            with warnings.catch_warnings():
+                warnings.simplefilter("error", FutureWarning)
+                store.at[row, attr] = value
+        except (FutureWarning, TypeError, ValueError):
+            # The value does not fit the column's dtype, so we fall back to objects
+            store[attr] = store[attr].astype("object")
+            store.at[row, attr] = value
 
     def get_player_attribute(self, player_name: str, attr: str) -> Any:
         """Get the attribute of a player in the team."""
@@ -145,14 +199,13 @@ class Team:
                 f"Player {player_name} not in team {self.team_letter}. Cannot get attribute."
             )
             return None
-        idx = np.where([p["nickname"] == player_name for p in self._players])[0][0]
-        player = self._players[idx]
-        if attr not in player:
+        store = self._get_player_store()
+        if attr not in store.columns:
             raise KeyError(f"Attribute {attr} not found in player {player_name}.")
-        return player[attr]
+        return store.at[self._nickname_index[player_name], attr]
 
     def contains_player(self, player_name: str):
-        return player_name in self.player_df["nickname"].tolist()
+        return player_name in self._nickname_index
 
     def get_new_stats_with_player(self, player: pd.Series) -> dict[str, int]:
         stats = self.sports_fulfill_nums.copy()
@@ -165,7 +218,7 @@ class Team:
         self, player_name: str, other: Team, register_as_reserve: bool = False
     ):
         """Move a player from this team to another team."""
-        player = self.player_df[self.player_df["nickname"] == player_name].iloc[0]
+        player = self._get_player_store().iloc[self._nickname_index[player_name]]
         self.remove_player(player)
         other.add_player(player, register_as_reserve)
         msg = f"Moved {player_name} from team {self.team_letter} to team {other.team_letter}."
@@ -240,7 +293,8 @@ class Team:
         self.create_backup(overwrite=True)
 
     def add_player(self, player: pd.Series, register_as_reserve=False):
-        self._players.append(player)
+        self._nickname_index[player["nickname"]] = len(self)
+        self._pending_players.append(player.to_dict())
         for sport in SPORTS_LIST:
             if player[sport]:
                 self.sports_fulfill_nums[sport] += 1
@@ -267,8 +321,11 @@ class Team:
     def remove_player(self, player: pd.Series):
         player = player.fillna("")
         nickname = player["nickname"]
-        player_index = [p["nickname"] for p in self._players].index(nickname)
-        self._players.pop(player_index)
+        store = self._get_player_store()
+        row = self._nickname_index[nickname]
+        self._player_store = store.drop(index=row).reset_index(drop=True)
+        self._sport_bits = None
+        self._rebuild_nickname_index()
         for sport in SPORTS_LIST:
             if player[sport]:
                 self.sports_fulfill_nums[sport] -= 1
@@ -280,9 +337,13 @@ class Team:
                 player[sub_key] = "R"
 
     def set_players(self, players: pd.DataFrame):
-        self._players = players.to_dict(orient="records")  # type: ignore
+        self._player_store = players.reset_index(drop=True)  # Copies the data
+        self._player_store["Team"] = self.name
+        self._pending_players = []
+        self._sport_bits = None
+        self._rebuild_nickname_index()
         self.sports_fulfill_nums = {
-            sport: np.sum(self.player_df[sport])
+            sport: np.sum(self._player_store[sport])
             for sport in SPORTS_LIST
             if sport in players.columns
         }
@@ -312,10 +373,13 @@ class Team:
             The name of the sport.
         sport_day_keys : list[str], optional
             The keys for the days of the week, by default None"""
-        avail = self.player_df[self.player_df[sport]]
-        if sport_day_keys is None:
-            return avail
-        return avail[avail[sport_day_keys].any(axis=1)]
+        store = self._get_player_store()
+        if self._sport_bits is None:
+            self._sport_bits = get_sport_bits(store)
+        mask = has_sport(self._sport_bits, sport)
+        if sport_day_keys is not None:
+            mask &= store[sport_day_keys].fillna(False).to_numpy(dtype=bool).any(axis=1)
+        return store[mask].copy()
 
     def write_streamlit_rep(self):
         st.write(f"## {self.name}")
@@ -326,7 +390,15 @@ class Team:
                 if "subteam_" in col or col == "nickname"
             ]
         ]
-        df.insert(0, "impath", df["nickname"].apply(FpathRegistry.get_animal_pic_path))
+        df.insert(
+            0,
+            "impath",
+            df["nickname"].apply(
+                lambda x: FpathRegistry.get_animal_pic_path(
+                    x, variant="table", inline=True
+                )
+            ),
+        )
 
         df = df.fillna("").sort_values("nickname")
         df["nickname"] = df["nickname"].apply(
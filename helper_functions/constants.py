@@ -34,6 +34,7 @@ class FpathRegistry:
 
     sport_locations = DATAPATH.joinpath("assets/sport_locations.yml")
     project_changelog = DATAPATH.joinpath("assets/changelog.yml")
+    avatar_bundle = DATAPATH.parent.joinpath("static/animal_pics/bundle")
 
     @staticmethod
     def get_path_matches(year=CURRENT_YEAR) -> Path:
@@ -86,10 +87,29 @@ class FpathRegistry:
         return DATAPATH.joinpath(f"{year}/running_sprints_results.md")
 
     @staticmethod
-    def get_animal_pic_path(animal_name: str, from_static: bool = True) -> str:
-        """Retrieves the animal pic path relative to the top level path."""
+    def get_animal_pic_path(
+        animal_name: str,
+        from_static: bool = True,
+        variant: Literal["table", "card"] = "card",
+        inline: bool = False,
+    ) -> str:
+        """Retrieves the animal pic path relative to the top level path.
+
+        If the avatar bundle has been built, the given variant is used (the small
+        one for table cells, the large one for player cards) in the preferred format
+        the bundle was built with, see `load_avatar_bundle`. With `inline`, the data
+        URI of the table variant is returned if available."""
+        from .setup.avatar_bundle import load_avatar_bundle
+
         name = animal_name.lower().replace(" ", "_")
+        avatars, data_uris = load_avatar_bundle()
+        if inline and name in data_uris:
+            return data_uris[name]
         static_path = f"static/animal_pics/small_size/{name}.png"
+        formats = avatars.get(name, {}).get(variant, {})
+        if len(formats) > 0:
+            # The formats are listed in the order of preference
+            static_path = next(iter(formats.values()))
         if from_static:
             return str(f"app/{static_path}")
         return str(DATAPATH.parent.joinpath(static_path))
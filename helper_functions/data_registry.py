@@ -2,16 +2,21 @@
 
 from __future__ import annotations
 
+import threading
 from dataclasses import dataclass, field
 from datetime import date, timedelta
 from pathlib import Path
-from typing import TYPE_CHECKING, Any, Literal
+from typing import TYPE_CHECKING, Any, Callable, Literal
 
 import pandas as pd
 import streamlit as st
 import yaml
 
 from .classes.match import Match
+from .classes.player_availability import PlayerAvailability
+from .classes.player_index import PlayerIndex
+from .classes.score_board import ScoreBoard
+from .classes.sport_index import SportIndex
 from .classes.sport_location import SportLocation
 from .classes.sports_organizer import SportsOrganizer
 from .classes.subteam import Subteam
@@ -55,7 +60,7 @@ def get_players(
     return pd.read_csv(FpathRegistry.get_path_responses(year))
 
 
-def get_subteams(year=CURRENT_YEAR) -> dict[str, Subteam]:
+def _build_subteams(teams: list[Team], year=CURRENT_YEAR) -> dict[str, Subteam]:
     all_subteams = {}
 
     if year == 2025:
@@ -64,7 +69,7 @@ def get_subteams(year=CURRENT_YEAR) -> dict[str, Subteam]:
                 for team in "ABC":
                     subteam = Subteam(sport, team, str(i + 1), [])
                     all_subteams[sport + "_" + subteam.short_key] = subteam
-    for team in get_teams(year):
+    for team in teams:
         df = team.player_df
         for sport in SPORTS_LIST:
             if sport not in df.columns:
@@ -94,10 +99,11 @@ def get_subteams(year=CURRENT_YEAR) -> dict[str, Subteam]:
     # return all_subteams
 
 
-# @st.cache_data(ttl=60)
-def get_match_df(year=CURRENT_YEAR, modification_time: str = "") -> pd.DataFrame:
-    # Use the modification time to check if the file has changed
-    fpath = FpathRegistry.get_path_matches(year)
+def get_subteams(year=CURRENT_YEAR) -> dict[str, Subteam]:
+    return _build_subteams(get_teams(year), year)
+
+
+def _read_match_df(fpath: Path) -> pd.DataFrame:
     if not fpath.exists():
         return pd.DataFrame()
     match_df = pd.read_csv(fpath)
@@ -105,20 +111,103 @@ def get_match_df(year=CURRENT_YEAR, modification_time: str = "") -> pd.DataFrame
     return match_df.infer_objects(copy=True).fillna("")  # type: ignore
 
 
+# @st.cache_data(ttl=60)
+def get_match_df(year=CURRENT_YEAR, modification_time: str = "") -> pd.DataFrame:
+    return _read_match_df(FpathRegistry.get_path_matches(year))
+
+
 def get_matches(year=CURRENT_YEAR, silent: bool = False) -> list[Match]:
-    mod_time = str(FpathRegistry.get_path_matches(year).stat().st_mtime)
-    match_df = get_match_df(year, modification_time=mod_time)
-    subteams = get_subteams(year)
-    match_list = []
-    for _, match_ in match_df.iterrows():
-        match_list.append(Match.from_dataframe_entry(match_, subteams, silent))
-        # except KeyError as e:
-        #     if not warn:
-        #         continue
-        #     LOGGER.warning(
-        #         f"Couldn't load {match_["full_key"]}.\n\t{match_["team_a"]} vs {match_["team_b"]} at {match_["start"]}."
-        #     )
-    return match_list
+    return Match.from_dataframe(get_match_df(year), get_subteams(year), silent)
+
+
+@dataclass
+class DataSnapshot:
+    """The teams, players, subteams and matches of a year, built from a single read
+    of each underlying file."""
+
+    teams: list[Team]
+    players: pd.DataFrame
+    subteams: dict[str, Subteam]
+    matches: list[Match]
+    match_df: pd.DataFrame
+    player_index: PlayerIndex
+    sport_index: SportIndex
+    availability: PlayerAvailability
+
+
+_FILE_CACHE: dict[Path, tuple[int, pd.DataFrame]] = {}
+"""The dataframes read from disk, together with the modification time they were read at."""
+_SNAPSHOTS: dict[int, tuple[tuple[int, ...], DataSnapshot]] = {}
+"""The latest snapshot of each year, keyed by the modification times of its files."""
+_SNAPSHOT_LOCK = threading.Lock()
+
+
+def _get_mtime(fpath: Path) -> int:
+    return fpath.stat().st_mtime_ns if fpath.exists() else -1
+
+
+def _read_cached(fpath: Path, reader: Callable[[Path], pd.DataFrame]) -> pd.DataFrame:
+    """Read the given file, reusing the previous result if it hasn't been modified since.
+    A copy is returned, so that the cached dataframe is never modified."""
+    mtime = _get_mtime(fpath)
+    cached = _FILE_CACHE.get(fpath)
+    if cached is None or cached[0] != mtime:
+        cached = (mtime, reader(fpath))
+        _FILE_CACHE[fpath] = cached
+    return cached[1].copy()
+
+
+def load_snapshot(
+    year=CURRENT_YEAR, silent: bool = False, rebuild: bool = False
+) -> DataSnapshot:
+    """Load the teams, players, subteams and matches of the given year.
+
+    Each file is only read once, and the snapshot is memoized on the modification
+    times of the files, so that reloading only re-reads the files that have changed.
+    With `rebuild`, the objects are built anew from the (cached) files even if none
+    of them changed, which discards any changes made to them in memory.
+    """
+    num_teams = len(list(DATAPATH.joinpath(f"{year}/teams/").glob("*.csv")))
+    team_paths = [Team.backup_path(i, year) for i in range(num_teams)]
+    match_path = FpathRegistry.get_path_matches(year)
+    response_path = FpathRegistry.get_path_responses(year)
+    mtimes = tuple(
+        _get_mtime(fpath) for fpath in [*team_paths, match_path, response_path]
+    )
+    with _SNAPSHOT_LOCK:
+        if not rebuild and year in _SNAPSHOTS and _SNAPSHOTS[year][0] == mtimes:
+            return _SNAPSHOTS[year][1]
+        teams = []
+        for i, fpath in enumerate(team_paths):
+            if not fpath.exists():
+                LOGGER.info(f"Couldn't load team {i}")
+                continue
+            teams.append(Team.from_dataframe(i, _read_cached(fpath, Team.read_backup)))
+        if len(teams) > 0:
+            players = pd.concat([team.player_df for team in teams])
+        else:
+            LOGGER.info(
+                "No teams found to get the players from. Trying to revert to the response sheet."
+            )
+            players = _read_cached(response_path, pd.read_csv)
+        subteams = _build_subteams(teams, year)
+        match_df = _read_cached(match_path, _read_match_df)
+        matches = Match.from_dataframe(match_df, subteams, silent)
+        player_index = PlayerIndex.from_data(subteams, matches)
+        sport_index = SportIndex.from_data(subteams, matches)
+        availability = PlayerAvailability.from_data(players, matches)
+        snapshot = DataSnapshot(
+            teams,
+            players,
+            subteams,
+            matches,
+            match_df,
+            player_index,
+            sport_index,
+            availability,
+        )
+        _SNAPSHOTS[year] = (mtimes, snapshot)
+        return snapshot
 
 
 def load_sport_locations() -> dict[str, SportLocation]:
@@ -149,20 +238,28 @@ class DataRegistry:
     matches: list[Match]
     match_df: pd.DataFrame
     organizers: dict[str, SportsOrganizer]
+    player_index: PlayerIndex
+    sport_index: SportIndex
+    availability: PlayerAvailability
     sport_events: dict[str, SportEvent] = field(init=False)
+    _score_board: ScoreBoard | None = field(default=None, init=False, repr=False)
 
     @classmethod
     def from_year(cls, year=CURRENT_YEAR) -> "DataRegistry":
-        teams = get_teams(year)
-
-        mod_time = str(FpathRegistry.get_path_responses(year).stat().st_mtime)
-        players = get_players(year=year, modification_time=mod_time)
-        subteams = get_subteams(year)
-        matches = get_matches(year)
-        mod_time = str(FpathRegistry.get_path_matches(year).stat().st_mtime)
-        match_df = get_match_df(year, modification_time=mod_time)
+        snapshot = load_snapshot(year)
         organizers = load_organizers(year)
-        return cls(year, teams, players, subteams, matches, match_df, organizers)
+        return cls(
+            year,
+            snapshot.teams,
+            snapshot.players,
+            snapshot.subteams,
+            snapshot.matches,
+            snapshot.match_df,
+            organizers,
+            snapshot.player_index,
+            snapshot.sport_index,
+            snapshot.availability,
+        )
 
     @property
     def path(self) -> Path:
@@ -186,6 +283,13 @@ class DataRegistry:
         """Whether there are scores in the data registry."""
         return len(self.teams) > 0 and any(self.match_df["winner"].notna())
 
+    @property
+    def score_board(self) -> ScoreBoard:
+        """The team and individual scores, computed on first access."""
+        if self._score_board is None:
+            self._score_board = ScoreBoard.from_data(self)
+        return self._score_board
+
     @property
     def start_date(self) -> date:
         """The start date of the sports week."""
@@ -221,6 +325,28 @@ class DataRegistry:
         day_idx = ["monday", "tuesday", "wednesday", "thursday", "friday"].index(day)
         return self.days[day_idx]
 
+    def get_available_reserves(self, nickname: str, sport: str) -> list[str]:
+        """The reserves of the given player's team for a sport that are free during
+        all of the player's matches of it, e.g. to replace them after a dropout."""
+        subteam = next(
+            (s for s in self.player_index.get_subteams(nickname) if s.sport == sport),
+            None,
+        )
+        if subteam is None:
+            return []
+        reserves = self.subteams.get(f"{sport}_{subteam.main_team_letter}R")
+        if reserves is None:
+            return []
+        available = [name for name in reserves.players if name != nickname]
+        for match_ in self.player_index.get_matches(nickname):
+            if match_.sport != sport:
+                continue
+            free = self.availability.get_available_reserves(match_, [reserves])
+            available = [
+                name for name in available if name in free[subteam.main_team_letter]
+            ]
+        return available
+
     def get_running_sprints_score(self, team_letter: str) -> float:
         """Return the score for the running sprints event."""
         # Maybe TODO: Read this stuff from some sort of file.
@@ -251,14 +377,23 @@ class DataRegistry:
         }
 
     def reload(self):
-        """Reloads the data from disk if it has updated."""
-        self.teams = get_teams(self.year)
-        self.players = get_players(year=self.year)
-        self.subteams = get_subteams(self.year)
-        self.matches = get_matches(self.year, silent=True)
-        self.match_df = get_match_df(self.year)
+        """Reloads the data from disk, discarding any changes that haven't been
+        written to it. Only the files that have been modified are read again."""
+        board = self._score_board
+        snapshot = load_snapshot(self.year, silent=True, rebuild=True)
+        self.teams = snapshot.teams
+        self.players = snapshot.players
+        self.subteams = snapshot.subteams
+        self.matches = snapshot.matches
+        self.match_df = snapshot.match_df
+        self.player_index = snapshot.player_index
+        self.sport_index = snapshot.sport_index
+        self.availability = snapshot.availability
         self.organizers = load_organizers(self.year)
         self.load_sport_events()
+        # The results are entered in the match file, so usually only a few changed
+        if board is None or not board.update_matches(self.matches):
+            self._score_board = None
 
     def get_hidden_feedback_info(self) -> dict[str, dict[str, Any]]:
         fpath = FpathRegistry.get_path_hidden(self.year).joinpath("feedback_info.yml")
@@ -270,17 +405,55 @@ class DataRegistry:
 
 
 ALL_LOCATIONS = load_sport_locations()
-DATA_2024 = DataRegistry.from_year(2024)
-DATA_NOW = DataRegistry.from_year(CURRENT_YEAR)
+
+_SUPPORTED_YEARS = (2024, CURRENT_YEAR)
+_REGISTRIES: dict[int, DataRegistry] = {}
+"""The fully loaded registries, filled on first access of each year."""
+_PENDING_REGISTRIES: dict[int, DataRegistry] = {}
+"""Registries whose sport events are still being loaded."""
+_REGISTRY_LOCK = threading.RLock()
 
 
 def get_data_for_year(year: int) -> DataRegistry:
-    """Get the data for a specific year."""
-    assert year in [2024, 2025], f"Year {year} not supported."
-    return {2024: DATA_2024, 2025: DATA_NOW}[year]
+    """Get the data for a specific year, loading it from disk on first access."""
+    assert year in _SUPPORTED_YEARS, f"Year {year} not supported."
+    if year in _REGISTRIES:
+        return _REGISTRIES[year]
+    # Re-entrant as the sport events need to look up their own registry while loading.
+    with _REGISTRY_LOCK:
+        if year in _REGISTRIES:
+            return _REGISTRIES[year]
+        if year in _PENDING_REGISTRIES:
+            return _PENDING_REGISTRIES[year]
+        data = DataRegistry.from_year(year)
+        _PENDING_REGISTRIES[year] = data
+        try:
+            data.load_sport_events()
+        finally:
+            del _PENDING_REGISTRIES[year]
+        _REGISTRIES[year] = data
+        LOGGER.info(f"Loaded data registry for {year}.")
+        return data
+
+
+class _LazyDataRegistry:
+    """Stand-in for the `DataRegistry` of a given year that only loads the
+    data once any of its attributes is accessed."""
+
+    def __init__(self, year: int):
+        object.__setattr__(self, "_year", year)
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(get_data_for_year(self._year), name)
+
+    def __setattr__(self, name: str, value: Any):
+        setattr(get_data_for_year(self._year), name, value)
+
+    def __repr__(self) -> str:
+        if self._year not in _REGISTRIES:
+            return f"<DataRegistry for {self._year} (not loaded yet)>"
+        return repr(_REGISTRIES[self._year])
 
 
-# The weird way of loading the sport events is due to the fact that we need to load them
-# after the data registries have been created.
-DATA_2024.load_sport_events()
-DATA_NOW.load_sport_events()
+DATA_2024: DataRegistry = _LazyDataRegistry(2024)  # type: ignore
+DATA_NOW: DataRegistry = _LazyDataRegistry(CURRENT_YEAR)  # type: ignore
@@ -5,12 +5,14 @@ dataframe, the teams, the sub-teams, and the schedules for each sport.
 from .sanitize_responses import generate_anonymous_names, sanitize_and_anonymize_data
 from .sanitize_old_responses import sanitize_and_anonymize_data_2024
 from .subteam_creation import generate_all_subteams, try_switch_players
-from .team_creation import create_teams
+from .team_creation import create_teams, optimize_teams, search_team_seeds
 
 __all__ = [
     "generate_anonymous_names",
     "sanitize_and_anonymize_data",
     "create_teams",
+    "search_team_seeds",
+    "optimize_teams",
     "generate_all_subteams",
     "try_switch_players",
     "sanitize_and_anonymize_data_2024",
@@ -0,0 +1,144 @@
+"""Build step for the avatar pictures shown in the tables and player cards.
+
+For each animal picture, size-optimized variants are written in WebP (with PNG as
+fallback), together with a manifest that lets the display code pick the small
+variant for table cells and the large one for player cards.
+Optionally, the table variant is also inlined as data URIs, so a full table
+does not need to request hundreds of separate pictures.
+The display code reads the bundle via `load_avatar_bundle`.
+"""
+
+import base64
+import io
+import json
+import time
+from pathlib import Path
+
+from PIL import Image, features
+
+from ..constants import DATAPATH, FpathRegistry
+from ..logger import LOGGER
+
+AVATAR_VARIANTS = {"table": 48, "card": 150}
+"""The pixel size of each avatar variant."""
+
+AVATAR_FORMATS = ("webp", "png")
+"""The formats each variant is saved in, in the order of preference."""
+
+_BUNDLE_CHECK_INTERVAL = 1.0
+"""The seconds after which the bundle files are checked for changes again, so that
+rendering a table checks them once instead of once per avatar."""
+
+_JSON_CACHE: dict[Path, tuple[int, dict]] = {}
+_BUNDLE: tuple[float, tuple[dict, dict[str, str]]] | None = None
+
+
+def get_avatar_source_dir() -> Path:
+    """The directory with the original pictures, falling back to the small size
+    pictures if the full size ones are not available."""
+    full_size_dir = DATAPATH.joinpath("assets/animal_pics/full_size")
+    if full_size_dir.exists():
+        return full_size_dir
+    return DATAPATH.parent.joinpath("static/animal_pics/small_size")
+
+
+def _read_json_cached(fpath: Path) -> dict:
+    """Read the given json file, only reading it again once it has changed."""
+    if not fpath.exists():
+        return {}
+    mtime = fpath.stat().st_mtime_ns
+    cached = _JSON_CACHE.get(fpath)
+    if cached is None or cached[0] != mtime:
+        cached = (mtime, json.loads(fpath.read_text()))
+        _JSON_CACHE[fpath] = cached
+    return cached[1]
+
+
+def load_avatar_bundle() -> tuple[dict[str, dict[str, dict[str, str]]], dict[str, str]]:
+    """The avatar paths of each variant and format from the bundle manifest, with the
+    formats in the order of preference, and the data URIs of the inlined variant.
+    Both are empty if the bundle hasn't been built."""
+    global _BUNDLE
+    now = time.monotonic()
+    if _BUNDLE is None or now - _BUNDLE[0] > _BUNDLE_CHECK_INTERVAL:
+        bundle_dir = FpathRegistry.avatar_bundle
+        manifest = _read_json_cached(bundle_dir.joinpath("manifest.json"))
+        data_uris = _read_json_cached(bundle_dir.joinpath("data_uris.json"))
+        _BUNDLE = (now, (manifest.get("avatars", {}), data_uris))
+    return _BUNDLE[1]
+
+
+def _encode_image(img: Image.Image, fmt: str) -> bytes:
+    buffer = io.BytesIO()
+    if fmt == "webp":
+        img.save(buffer, format="WEBP", quality=80, method=6)
+    else:
+        img.save(buffer, format="PNG", optimize=True)
+    return buffer.getvalue()
+
+
+def build_avatar_bundle(
+    variants: dict[str, int] = AVATAR_VARIANTS,
+    formats: tuple[str, ...] = AVATAR_FORMATS,
+    inline_variant: str | None = "table",
+    source_dir: Path | None = None,
+) -> dict:
+    """Write all avatar variants and the manifest into the bundle directory.
+
+    Parameters
+    ----------
+    variants : dict[str, int], optional
+        The pixel size for each variant name, by default 48 px for tables and
+        150 px for player cards.
+    formats : tuple[str, ...], optional
+        The formats to save each variant in, in the order of preference, by default
+        WebP and PNG. WebP is skipped if Pillow can't encode it, so the pictures are
+        served as PNG instead.
+    inline_variant : str | None, optional
+        The variant to additionally store as data URIs, by default "table".
+        No data URIs are written if None.
+    source_dir : Path | None, optional
+        The directory with the original pictures, by default the full size
+        directory (or the small size one if the former is not available).
+
+    Returns
+    -------
+    dict
+        The manifest that has been written.
+    """
+    assert inline_variant is None or inline_variant in variants
+    if "webp" in formats and not features.check("webp"):
+        LOGGER.warning("Pillow has no WebP support, falling back to PNG avatars.")
+        formats = tuple(fmt for fmt in formats if fmt != "webp") or ("png",)
+    source_dir = source_dir if source_dir is not None else get_avatar_source_dir()
+    bundle_dir = FpathRegistry.avatar_bundle
+    root = DATAPATH.parent
+    avatars: dict[str, dict[str, dict[str, str]]] = {}
+    data_uris: dict[str, str] = {}
+    for fpath in sorted(source_dir.glob("*.png")):
+        name = fpath.stem.lower()
+        with Image.open(fpath) as img:
+            img = img.convert("RGBA")
+            avatars[name] = {}
+            for variant, size in variants.items():
+                resized = img.resize((size, size), Image.Resampling.LANCZOS)
+                avatars[name][variant] = {}
+                for fmt in formats:
+                    encoded = _encode_image(resized, fmt)
+                    out_path = bundle_dir.joinpath(f"{size}px/{name}.{fmt}")
+                    out_path.parent.mkdir(parents=True, exist_ok=True)
+                    out_path.write_bytes(encoded)
+                    avatars[name][variant][fmt] = out_path.relative_to(root).as_posix()
+                    if variant == inline_variant and name not in data_uris:
+                        b64 = base64.b64encode(encoded).decode("ascii")
+                        data_uris[name] = f"data:image/{fmt};base64,{b64}"
+    manifest = {
+        "variants": variants,
+        "formats": list(formats),
+        "avatars": avatars,
+    }
+    bundle_dir.joinpath("manifest.json").write_text(json.dumps(manifest, indent=1))
+    if inline_variant is not None:
+        bundle_dir.joinpath("data_uris.json").write_text(json.dumps(data_uris))
+    LOGGER.info(f"Wrote {len(avatars)} avatars to the bundle at {bundle_dir}")
+    return manifest
@@ -0,0 +1,264 @@
+"""Rescheduling of all matches of a sport that fall into a blackout window, e.g.
+when the matches of a day have to be cancelled due to rain.
+
+The affected matches are placed into the remaining (slot, pitch) cells of the
+sport, such that no pitch is used twice and no player has to take part in two
+matches at the same time. Randomized greedy placements are repeated within a
+time budget, and the distinct complete plans are ranked by how much they delay
+the matches and how many days they are spread over.
+"""
+
+from __future__ import annotations
+
+import time
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta
+from typing import Iterable
+
+import numpy as np
+
+from ..classes.match import Match
+from ..classes.player_availability import PlayerAvailability
+from ..data_registry import DataRegistry
+from ..logger import LOGGER
+from ..util import write_changelog_entry
+from .constraint_scheduling import get_match_slots
+from .match_scheduling import write_match_backup
+from .rescheduling import RescheduleSession
+
+_DAY_COST = 1.0
+"""The additional cost for each day the rescheduled matches are spread over."""
+
+
+@dataclass
+class ReschedulingPlan:
+    """New start times and pitches for the matches affected by a cancellation."""
+
+    moves: list[tuple[Match, datetime, str]] = field(default_factory=list)
+    """The affected matches with their new start time and location."""
+
+    cost: float = 0.0
+    """The total delay of the matches in hours, plus a cost for each day used."""
+
+    previous: list[tuple[datetime, str]] = field(default_factory=list)
+    """The start time and location of each affected match when the plan was made."""
+
+    @property
+    def description(self) -> str:
+        lines = [f"Plan with cost {self.cost:.2f}:"]
+        for (match_, start, location), (old_start, old_location) in zip(
+            self.moves, self.previous
+        ):
+            old_start = old_start.strftime("%H:%M, %A")
+            new_start = start.strftime("%H:%M, %A")
+            lines.append(
+                f"{match_.match_key}: {old_start} ({old_location}) -> {new_start} ({location})"
+            )
+        return "\n".join(lines)
+
+
+def _get_candidate_cells(
+    data: DataRegistry,
+    sport: str,
+    blackout_end: datetime,
+    affected: list[Match],
+    extra_windows: Iterable[tuple[datetime, datetime]],
+) -> list[tuple[datetime, datetime, str]]:
+    """The (start, end, location) cells after the blackout that no other match of
+    the sport takes place in, and that are not taken by another sport sharing the
+    venue (e.g. the big field)."""
+    event = data.sport_events[sport]
+    slots = get_match_slots(event)
+    for window_start, window_end in extra_windows:
+        start = window_start
+        while start + event.match_duration <= window_end:
+            slots.append((start, start + event.match_duration))
+            start += event.match_duration
+    locations = [str(i + 1) for i in range(event.num_pitches)]
+    others = [m for m in event.matches if all(m is not a for a in affected)]
+    # The pitches of different sports are numbered independently, so a match of
+    # another sport at the same venue blocks all of its pitches
+    shared = [
+        m
+        for m in data.matches
+        if m.sport != sport
+        and m.sport in data.sport_events
+        and data.sport_events[m.sport].loc.key == event.loc.key
+    ]
+    return [
+        (start, end, location)
+        for start, end in sorted(set(slots))
+        if start >= blackout_end
+        and not any(m.start < end and start < m.end for m in shared)
+        for location in locations
+        if not any(
+            m.location == location and m.start < end and start < m.end for m in others
+        )
+    ]
+
+
+def _get_cost(match_: Match, start: datetime) -> float:
+    return max((start - match_.start).total_seconds() / 3600, 0.0)
+
+
+def _build_plan(
+    affected: list[Match],
+    cells: list[tuple[datetime, datetime, str]],
+    feasible: np.ndarray,
+    players: list[list[str]],
+    buffer: timedelta,
+    rng: np.random.Generator | None,
+) -> ReschedulingPlan | None:
+    """Greedily place the affected matches, in order of their number of feasible
+    cells, picking the cheapest cell (or one of the cheapest few if randomized)."""
+    used_cells: set[int] = set()
+    busy: dict[str, list[tuple[datetime, datetime]]] = {}
+    days: set[date] = set()
+    order = np.argsort(feasible.sum(axis=1), kind="stable")
+    if rng is not None:
+        order = np.argsort(feasible.sum(axis=1) + rng.random(len(affected)) * 3)
+    moves = []
+    cost = 0.0
+    for i in order:
+        options = []
+        for j in np.flatnonzero(feasible[i]):
+            start, end, _ = cells[j]
+            if j in used_cells:
+                continue
+            if any(
+                b_start - buffer < end and start < b_end + buffer
+                for player in players[i]
+                for b_start, b_end in busy.get(player, [])
+            ):
+                continue
+            day_cost = _DAY_COST if start.date() not in days else 0.0
+            options.append((_get_cost(affected[i], start) + day_cost, int(j)))
+        if len(options) == 0:
+            return None
+        options.sort()
+        if rng is not None:
+            options = options[: rng.integers(1, 4)]
+            choice = options[rng.integers(len(options))]
+        else:
+            choice = options[0]
+        option_cost, j = choice
+        start, end, location = cells[j]
+        used_cells.add(j)
+        days.add(start.date())
+        for player in players[i]:
+            busy.setdefault(player, []).append((start, end))
+        moves.append((affected[i], start, location))
+        cost += option_cost
+    moves.sort(key=lambda move: (move[1], move[2]))
+    previous = [(match_.start, match_.location) for match_, _, _ in moves]
+    return ReschedulingPlan(moves, cost, previous)
+
+
+def find_rescheduling_plans(
+    data: DataRegistry,
+    sport: str,
+    blackout_start: datetime,
+    blackout_end: datetime,
+    extra_windows: Iterable[tuple[datetime, datetime]] = (),
+    time_budget: float = 2.0,
+    num_plans: int = 5,
+    buffer_in_minutes: int = 0,
+    seed: int = 42,
+) -> list[ReschedulingPlan]:
+    """Find alternative slots for all matches of a sport in the blackout window.
+
+    Parameters
+    ----------
+    data : DataRegistry
+        The registry with the current schedule.
+    sport : str
+        The sanitized name of the sport whose matches are cancelled.
+    blackout_start : datetime
+        The start of the window in which the matches cannot take place.
+    blackout_end : datetime
+        The end of the window, the matches are only moved to slots after it.
+    extra_windows : Iterable[tuple[datetime, datetime]], optional
+        Time windows in addition to those of the sport event, e.g. another
+        evening on which the pitches are available.
+    time_budget : float, optional
+        The time in seconds after which the search stops, by default 2.0
+    num_plans : int, optional
+        The maximum number of plans to return, by default 5
+    buffer_in_minutes : int, optional
+        Transition time a player has at least between two matches, by default 0
+    seed : int, optional
+        The seed for the randomized placements, by default 42
+
+    Returns
+    -------
+    list[ReschedulingPlan]
+        The distinct feasible plans, cheapest first. Empty if no plan was found.
+    """
+    affected = [
+        m
+        for m in data.sport_events[sport].matches
+        if m.start < blackout_end and blackout_start < m.end
+    ]
+    if len(affected) == 0:
+        LOGGER.info(f"No {sport} matches take place in the blackout window.")
+        return []
+    cells = _get_candidate_cells(data, sport, blackout_end, affected, extra_windows)
+    others = [m for m in data.matches if all(m is not a for a in affected)]
+    availability = PlayerAvailability.from_data(data.players, others)
+    buffer = timedelta(minutes=buffer_in_minutes)
+    # Whether each affected match could take place in each cell on its own
+    feasible = np.zeros((len(affected), len(cells)), dtype=bool)
+    for j, (start, end, _) in enumerate(cells):
+        free = availability.get_free_mask(start - buffer, end + buffer)
+        for i, match_ in enumerate(affected):
+            rows = availability.get_rows(match_.involved_players)
+            feasible[i, j] = free[rows].all()
+    players = [list(dict.fromkeys(m.involved_players)) for m in affected]
+    rng = np.random.default_rng(seed)
+    plans: dict[tuple, ReschedulingPlan] = {}
+    t_start = time.perf_counter()
+    num_tries = 0
+    while time.perf_counter() - t_start < time_budget:
+        # The first try is the deterministic greedy placement
+        plan = _build_plan(
+            affected, cells, feasible, players, buffer, rng if num_tries > 0 else None
+        )
+        num_tries += 1
+        if plan is not None:
+            key = tuple((id(m), start, loc) for m, start, loc in plan.moves)
+            plans.setdefault(key, plan)
+    ranked = sorted(plans.values(), key=lambda plan: plan.cost)[:num_plans]
+    LOGGER.info(
+        f"Found {len(plans)} distinct plans for {len(affected)} {sport} matches in {num_tries} tries."
+    )
+    if len(ranked) == 0:
+        LOGGER.warning(
+            f"No feasible plan for {sport}, consider passing additional windows."
+        )
+    return ranked
+
+
+def apply_rescheduling_plan(
+    data: DataRegistry,
+    plan: ReschedulingPlan,
+    reason: str = "",
+    overwrite: bool = True,
+) -> None:
+    """Move the matches as given by the plan and write the new match backup.
+    A changelog entry is written for each moved match, for which you should
+    check the box after notifying the affected players."""
+    session = RescheduleSession(data.matches)
+    added = []
+    for match_, start, location in plan.moves:
+        added += session.move(match_, start, location).added
+    if len(added) > 0:
+        while session.can_undo:
+            session.undo()
+        descriptions = "\n".join(collision.description for collision in added)
+        raise ValueError(f"The plan introduces collisions:\n{descriptions}")
+    for (match_, start, location), (old_start, _) in zip(plan.moves, plan.previous):
+        msg = f"Moved {match_.match_key} from {old_start.strftime('%H:%M, %A')} to {start.strftime('%H:%M, %A')} ({location})"
+        if reason != "":
+            msg += f" due to {reason}"
+        write_changelog_entry(msg, data.year, add_checkbox=True)
+    write_match_backup(data.matches, data.year, overwrite=overwrite)
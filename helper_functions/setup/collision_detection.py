@@ -0,0 +1,101 @@
+"""Schedule-wide detection of hard collisions, i.e. players that are supposed
+to take part in two matches at the same time.
+
+Instead of comparing each pair of matches via `Match.has_hard_collision`, the
+matches are swept through in order of their start time, and each player keeps
+track of the matches they are currently involved in.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Iterable
+
+from ..classes.match import Match
+from ..logger import LOGGER
+
+
+@dataclass
+class Collision:
+    """A hard collision between two matches that share at least one player."""
+
+    match_a: Match
+    """The match starting first."""
+
+    match_b: Match
+    """The match starting at the same time or later."""
+
+    players: set[str] = field(default_factory=set)
+    """The nicknames of the players involved in both matches."""
+
+    @property
+    def team_letter(self) -> str:
+        """The main team letter of the affected players."""
+        player = next(iter(self.players))
+        return [
+            team.main_team_letter
+            for team in (self.match_a.subteam_a, self.match_a.subteam_b)
+            if player in team.players
+        ][0]
+
+    @property
+    def description(self) -> str:
+        a_start = self.match_a.start.strftime("%H:%M, %A")
+        b_start = self.match_b.start.strftime("%H:%M, %A")
+        return f"{self.match_a.match_key}, {self.match_b.match_key}: {self.players} ({self.team_letter}) have conflicting schedules ({a_start}, {b_start})."
+
+
+def find_hard_collisions(
+    matches: Iterable[Match], buffer_in_minutes: int = 0, verbose: bool = False
+) -> list[Collision]:
+    """Find all hard collisions within the given matches.
+
+    Parameters
+    ----------
+    matches : Iterable[Match]
+        The matches to check, e.g. the full schedule.
+    buffer_in_minutes : int, optional
+        Transition time that is added before and after each match, by default 0
+        (which corresponds to `Match.has_hard_collision`).
+    verbose : bool, optional
+        Whether to log a warning for each collision, by default False.
+
+    Returns
+    -------
+    list[Collision]
+        The collisions sorted by the start of their first match.
+    """
+    intervals = sorted(
+        [
+            (*match_.get_buffered_timetuple(buffer_in_minutes), match_)
+            for match_ in matches
+        ],
+        key=lambda interval: interval[0],
+    )
+    # The intervals of each player that might still overlap with upcoming ones
+    active: dict[str, list[tuple[datetime, datetime, Match]]] = {}
+    collisions: dict[tuple[int, int], Collision] = {}
+    for start, end, match_ in intervals:
+        for player in dict.fromkeys(match_.involved_players):
+            # Intervals that ended already can't collide with any later ones
+            player_active = [
+                interval for interval in active.get(player, []) if interval[1] > start
+            ]
+            for _, _, other in player_active:
+                if match_.sport == other.sport == "running_sprints":
+                    continue
+                collision = collisions.setdefault(
+                    (id(other), id(match_)), Collision(other, match_)
+                )
+                collision.players.add(player)
+            player_active.append((start, end, match_))
+            active[player] = player_active
+    sorted_collisions = sorted(
+        collisions.values(),
+        key=lambda collision: (collision.match_a.start, collision.match_b.start),
+    )
+    if verbose:
+        for collision in sorted_collisions:
+            LOGGER.warning(collision.description)
+    return sorted_collisions
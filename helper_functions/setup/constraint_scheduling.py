@@ -0,0 +1,371 @@
+"""Scheduling of the matches of all sports at once, without any hard collisions.
+
+Each matchup is a variable whose domain are the time slots of its sport. Whenever
+a matchup is assigned a slot, all overlapping slots are removed from the domains of
+the matchups sharing a player with it (forward checking), and a full slot is
+removed from the domains of the other matchups of that sport. The matchups are
+assigned in order of their remaining number of slots, and the search backtracks
+if any domain runs empty, so the resulting schedule is collision-free by
+construction. Slots on days that players of a matchup said they are not available
+on are only tried after all others.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Iterable, Iterator
+
+import numpy as np
+
+from ..classes.match import Match
+from ..classes.player_availability import PlayerAvailability
+from ..classes.sport_event import SportEvent
+from ..classes.subteam import Subteam
+from ..data_registry import DataRegistry
+from ..logger import LOGGER
+from .collision_detection import find_hard_collisions
+from .match_scheduling import determine_rotated_matchups_for_sport
+
+
+@dataclass
+class _Slot:
+    """A time slot in which a limited number of matches of a sport can take place."""
+
+    sport: str
+    start: datetime
+    end: datetime
+    capacity: int
+
+
+@dataclass
+class _SearchFrame:
+    """A matchup on the search path, with the slots that are left to try for it."""
+
+    matchup: int
+    slots: Iterator[int]
+    assigned: tuple[int, list[tuple[int, int]]] | None = None
+
+
+def get_match_slots(
+    sport_event: SportEvent,
+) -> list[tuple[datetime, datetime]]:
+    """The start and end of each slot in the time windows of the given sport."""
+    slots = []
+    for window_start, window_end in sport_event.time_windows:
+        start = window_start
+        while start + sport_event.match_duration <= window_end:
+            slots.append((start, start + sport_event.match_duration))
+            start += sport_event.match_duration
+    return slots
+
+
+def _get_subteam_keys(matchup: tuple[Subteam, Subteam]) -> list[str]:
+    return [f"{subteam.sport}_{subteam.short_key}" for subteam in matchup]
+
+
+def _get_players(matchup: tuple[Subteam, Subteam]) -> list[str]:
+    return list(dict.fromkeys(matchup[0].players + matchup[1].players))
+
+
+def _get_tokens(subteam_a: Subteam, subteam_b: Subteam) -> set[str]:
+    """The players of a matchup, plus the subteams themselves so that a subteam
+    without any players is not scheduled twice at the same time either."""
+    return {
+        *subteam_a.players,
+        *subteam_b.players,
+        *_get_subteam_keys((subteam_a, subteam_b)),
+    }
+
+
+class _MatchScheduler:
+    """Backtracking search with forward checking over the slots of all matchups."""
+
+    def __init__(
+        self,
+        matchups: list[tuple[Subteam, Subteam]],
+        slots: list[_Slot],
+        fixed_matches: list[Match],
+        availability: PlayerAvailability,
+        buffer: timedelta,
+        rng: np.random.Generator,
+        max_backtracks: int,
+    ):
+        self.matchups = matchups
+        self.slots = slots
+        self.rng = rng
+        self.max_backtracks = max_backtracks
+        self.num_backtracks = 0
+        self.tokens = [_get_tokens(*matchup) for matchup in matchups]
+        # The number of players of each matchup that are not available on each day
+        unavailable = ~availability.available_days
+        self.num_unavailable = np.array(
+            [
+                unavailable[availability.get_rows(_get_players(matchup))].sum(axis=0)
+                for matchup in matchups
+            ]
+        )
+        sport_slots: dict[str, list[int]] = {}
+        for i, slot in enumerate(slots):
+            sport_slots.setdefault(slot.sport, []).append(i)
+        # The slots (of any sport) that overlap with each slot, including the buffer
+        self.overlapping: list[list[int]] = [
+            [
+                j
+                for j, other in enumerate(slots)
+                if other.start < slot.end + buffer and slot.start < other.end + buffer
+            ]
+            for slot in slots
+        ]
+        self.domains: list[set[int]] = [
+            set(sport_slots.get(matchup[0].sport, [])) for matchup in matchups
+        ]
+        self.neighbors: list[list[int]] = [[] for _ in matchups]
+        by_token: dict[str, list[int]] = {}
+        for i, tokens in enumerate(self.tokens):
+            for token in tokens:
+                by_token.setdefault(token, []).append(i)
+        for indices in by_token.values():
+            for i in indices:
+                self.neighbors[i] += [j for j in indices if j != i]
+        self.neighbors = [sorted(set(neighbors)) for neighbors in self.neighbors]
+        self.same_sport: dict[str, list[int]] = {}
+        for i, matchup in enumerate(matchups):
+            self.same_sport.setdefault(matchup[0].sport, []).append(i)
+        # Matches that are already fixed block their slots for the players involved
+        for match_ in fixed_matches:
+            match_tokens = _get_tokens(match_.subteam_a, match_.subteam_b)
+            start, end = match_.start - buffer, match_.end + buffer
+            for i, tokens in enumerate(self.tokens):
+                if tokens.isdisjoint(match_tokens):
+                    continue
+                self.domains[i] -= {
+                    j
+                    for j in self.domains[i]
+                    if slots[j].start < end and start < slots[j].end
+                }
+        self.assignment: list[int | None] = [None] * len(matchups)
+        self.usage = [0] * len(slots)
+        # The slots each subteam is playing in (for preferring short waiting times)
+        self.subteam_slots: dict[str, list[int]] = {}
+
+    def _select_matchup(self) -> int:
+        """The unassigned matchup with the fewest remaining slots, ties broken by the
+        number of matchups it shares players with."""
+        return min(
+            (i for i, slot in enumerate(self.assignment) if slot is None),
+            key=lambda i: (len(self.domains[i]), -len(self.neighbors[i])),
+        )
+
+    def _order_slots(self, i: int) -> list[int]:
+        """Order the slots such that the players are available on their day and
+        subteams have short breaks between their matches, and otherwise the
+        earliest slots are filled first."""
+        keys = _get_subteam_keys(self.matchups[i])
+        starts = {j: self.slots[j].start for j in self.domains[i]}
+
+        def score(j: int) -> tuple[int, float, datetime, float]:
+            day = starts[j].weekday()
+            num_unavailable = 0
+            if day < self.num_unavailable.shape[1]:
+                num_unavailable = self.num_unavailable[i, day]
+            gap = 0.0
+            for key in keys:
+                played = self.subteam_slots.get(key, [])
+                if len(played) > 0:
+                    gap += min(
+                        abs((starts[j] - self.slots[k].start).total_seconds())
+                        for k in played
+                    )
+            return num_unavailable, gap, starts[j], self.rng.random()
+
+        return sorted(self.domains[i], key=score)
+
+    def _assign(self, i: int, j: int) -> list[tuple[int, int]] | None:
+        """Assign slot j to matchup i, returning the removed (matchup, slot) pairs,
+        or None (with everything undone) if a domain ran empty."""
+        removed: list[tuple[int, int]] = []
+        self.assignment[i] = j
+        self.usage[j] += 1
+        for key in _get_subteam_keys(self.matchups[i]):
+            self.subteam_slots.setdefault(key, []).append(j)
+        affected = [(n, self.overlapping[j]) for n in self.neighbors[i]]
+        if self.usage[j] >= self.slots[j].capacity:
+            affected += [(n, [j]) for n in self.same_sport[self.matchups[i][0].sport]]
+        feasible = True
+        for n, blocked in affected:
+            if self.assignment[n] is not None:
+                continue
+            domain = self.domains[n]
+            for k in blocked:
+                if k in domain:
+                    domain.remove(k)
+                    removed.append((n, k))
+            if len(domain) == 0:
+                feasible = False
+                break
+        if not feasible:
+            self._unassign(i, j, removed)
+            return None
+        return removed
+
+    def _unassign(self, i: int, j: int, removed: list[tuple[int, int]]):
+        for n, k in removed:
+            self.domains[n].add(k)
+        self.assignment[i] = None
+        self.usage[j] -= 1
+        for key in _get_subteam_keys(self.matchups[i]):
+            self.subteam_slots[key].remove(j)
+
+    def solve(self) -> bool:
+        """Assign a slot to every matchup, keeping the search path on an explicit
+        stack so that large schedules do not run into the recursion limit."""
+        if len(self.matchups) == 0:
+            return True
+        i = self._select_matchup()
+        stack = [_SearchFrame(i, iter(self._order_slots(i)))]
+        while len(stack) > 0:
+            frame = stack[-1]
+            if frame.assigned is not None:
+                # Everything below this frame failed, so try its next slot
+                self._unassign(frame.matchup, *frame.assigned)
+                frame.assigned = None
+                self.num_backtracks += 1
+                if self.num_backtracks > self.max_backtracks:
+                    raise ValueError(
+                        f"Gave up scheduling after {self.max_backtracks} backtracks."
+                    )
+            for j in frame.slots:
+                removed = self._assign(frame.matchup, j)
+                if removed is not None:
+                    frame.assigned = (j, removed)
+                    break
+            else:
+                stack.pop()
+                continue
+            if len(stack) == len(self.matchups):
+                return True
+            i = self._select_matchup()
+            stack.append(_SearchFrame(i, iter(self._order_slots(i))))
+        return False
+
+
+def _check_subteam_counts(data: DataRegistry, sports: Iterable[str]):
+    """Raise a ValueError if any team has a different number of (non-reserve)
+    subteams for one of the sports than the others, as the rotated matchups
+    need the same number for each team."""
+    problems = []
+    for sport in sports:
+        counts = {letter: 0 for letter in "ABC"}
+        for subteam in data.subteams.values():
+            if subteam.sport == sport and not subteam.is_reserve:
+                counts[subteam.main_team_letter] += 1
+        if len(set(counts.values())) > 1:
+            found = ", ".join(f"{letter}: {num}" for letter, num in counts.items())
+            problems.append(f"{sport} ({found})")
+    if len(problems) > 0:
+        raise ValueError(
+            "Each team needs the same number of subteams for the rotated matchups, "
+            f"but found {'; '.join(problems)}."
+        )
+
+
+def schedule_all_matches(
+    data: DataRegistry,
+    sports: Iterable[str] | None = None,
+    fixed_matches: Iterable[Match] = (),
+    buffer_in_minutes: int = 0,
+    seed: int = 42,
+    max_backtracks: int = 100_000,
+) -> list[Match]:
+    """Schedule the matches of the given sports at once, such that no player has
+    to take part in two matches at the same time.
+
+    Parameters
+    ----------
+    data : DataRegistry
+        The registry to take the subteams and sport events from.
+    sports : Iterable[str] | None, optional
+        The sports to schedule, by default all but ping pong (which is spread over
+        the week and scheduled separately) and running sprints (which has a single
+        heat for all subteams).
+    fixed_matches : Iterable[Match], optional
+        Matches that are already scheduled, e.g. the running sprints, which the
+        new matches must not collide with.
+    buffer_in_minutes : int, optional
+        Transition time a player has at least between two matches, by default 0
+    seed : int, optional
+        The seed for breaking ties between equally good slots, by default 42
+    max_backtracks : int, optional
+        The number of backtracks after which the search gives up, by default 100000
+
+    Returns
+    -------
+    list[Match]
+        The scheduled matches, sorted by their start time.
+
+    Raises
+    ------
+    ValueError
+        If a team has a different number of subteams for a sport than the others,
+        or if there is no schedule without collisions.
+    """
+    if sports is None:
+        sports = [
+            sport
+            for sport in data.sport_events
+            if sport not in ["ping_pong", "running_sprints"]
+        ]
+    sport_events = [data.sport_events[sport] for sport in sports]
+    _check_subteam_counts(data, [event.sanitized_name for event in sport_events])
+    fixed_matches = list(fixed_matches)
+    matchups: list[tuple[Subteam, Subteam]] = []
+    slots: list[_Slot] = []
+    for event in sport_events:
+        sport_matchups = determine_rotated_matchups_for_sport(
+            data.subteams, event.sanitized_name
+        )
+        sport_slots = [
+            _Slot(event.sanitized_name, start, end, event.num_pitches)
+            for start, end in get_match_slots(event)
+        ]
+        if len(sport_matchups) > len(sport_slots) * event.num_pitches:
+            raise ValueError(
+                f"{event.name}: {len(sport_matchups)} matches do not fit into {len(sport_slots)} slots with {event.num_pitches} pitches."
+            )
+        matchups += sport_matchups
+        slots += sport_slots
+    scheduler = _MatchScheduler(
+        matchups,
+        slots,
+        fixed_matches,
+        PlayerAvailability.from_data(data.players),
+        timedelta(minutes=buffer_in_minutes),
+        np.random.default_rng(seed),
+        max_backtracks,
+    )
+    if not scheduler.solve():
+        raise ValueError("There is no schedule without hard collisions.")
+    LOGGER.info(
+        f"Scheduled {len(matchups)} matches with {scheduler.num_backtracks} backtracks."
+    )
+    num_used = [0] * len(slots)
+    matches = []
+    for (subteam_a, subteam_b), j in zip(matchups, scheduler.assignment):
+        slot = slots[j]  # type: ignore
+        num_used[j] += 1  # type: ignore
+        matches.append(
+            Match(
+                slot.sport,
+                slot.start,
+                slot.end - slot.start,
+                subteam_a,
+                subteam_b,
+                str(num_used[j]),  # type: ignore
+            )
+        )
+    collisions = find_hard_collisions(matches + fixed_matches)
+    if len(collisions) > 0:
+        descriptions = "\n".join(collision.description for collision in collisions)
+        raise ValueError(f"The schedule contains collisions:\n{descriptions}")
+    return sorted(matches, key=lambda match_: match_.start)
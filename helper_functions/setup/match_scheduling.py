@@ -178,6 +178,9 @@ def reshuffle_list(list_to_shuffle: list, interval=2) -> list:
 def schedule_matches(
     data: DataRegistry, sport_event: "SportEvent", shuffle_interval=2
 ) -> list[Match]:
+    """Schedule the matches of a single sport by filling its slots in order.
+    This does not check for players colliding with other sports, for which
+    `constraint_scheduling.schedule_all_matches` should be used instead."""
     subteams = data.subteams
     matchups = determine_rotated_matchups_for_sport(
         subteams, sport_event.sanitized_name
@@ -1 +1,343 @@
-"""For ping pong, a few extra functions are necessary to schedule the matches."""
+"""For ping pong, a few extra functions are necessary to schedule the matches.
+
+Ping pong runs all week on a few tables, and each player has given the days
+they are available (see `PlayerAvailability.ping_pong_days`).
+Each player plays one match against a player of each of the other teams.
+
+The scheduling happens in two steps, both solved as min-cost flows:
+
+1. The matchups between each pair of teams are a bipartite matching of their
+   players, favouring pairs with many common days that are free of other sports.
+   The third matching avoids closing triangles (A vs B, B vs C and C vs A for
+   the same three players) to prevent grouping effects.
+2. The matches are packed into (day, slot, table) cells on the common days of
+   their players, away from the players' other matches. If a player ends up with
+   two matches at the same time, one of them is banned from that slot and the
+   packing is solved again.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Iterable
+
+import numpy as np
+
+from ..classes.match import Match
+from ..classes.player_availability import PlayerAvailability
+from ..classes.subteam import Subteam
+from ..data_registry import DataRegistry
+from ..logger import LOGGER
+from .constraint_scheduling import get_match_slots
+from .min_cost_flow import MinCostFlowGraph
+
+_NO_COMMON_DAY_COST = 100.0
+"""The cost for matching two players without common days, only used if unavoidable."""
+
+
+@dataclass
+class PingPongSchedule:
+    """The outcome of scheduling the ping pong matches."""
+
+    matches: list[Match] = field(default_factory=list)
+    """The scheduled matches, sorted by their start time."""
+
+    unscheduled: list[tuple[Subteam, Subteam]] = field(default_factory=list)
+    """Matchups for which no slot could be found, to be scheduled by hand."""
+
+
+def _get_team_subteams(data: DataRegistry) -> dict[str, list[Subteam]]:
+    """The ping pong subteams (each of a single player) of each team."""
+    team_subteams: dict[str, list[Subteam]] = {}
+    for subteam in data.sport_events["ping_pong"].subteams:
+        if subteam.is_reserve or len(subteam.players) != 1:
+            continue
+        team_subteams.setdefault(subteam.main_team_letter, []).append(subteam)
+    return team_subteams
+
+
+def _match_teams(
+    subteams_x: list[Subteam],
+    subteams_y: list[Subteam],
+    costs: dict[tuple[str, str], float],
+    banned: set[tuple[str, str]],
+) -> list[tuple[Subteam, Subteam]]:
+    """Find the cheapest matching between the players of two teams."""
+    graph = MinCostFlowGraph()
+    source, sink = graph.add_node(), graph.add_node()
+    nodes_x = [graph.add_node() for _ in subteams_x]
+    nodes_y = [graph.add_node() for _ in subteams_y]
+    for node in nodes_x:
+        graph.add_edge(source, node, 1, 0.0)
+    for node in nodes_y:
+        graph.add_edge(node, sink, 1, 0.0)
+    edges = []
+    for i, subteam_x in enumerate(subteams_x):
+        for j, subteam_y in enumerate(subteams_y):
+            pair = (subteam_x.players[0], subteam_y.players[0])
+            if pair in banned:
+                continue
+            edge = graph.add_edge(nodes_x[i], nodes_y[j], 1, costs[pair])
+            edges.append((edge, subteam_x, subteam_y))
+    graph.solve(source, sink)
+    return [
+        (subteam_x, subteam_y)
+        for edge, subteam_x, subteam_y in edges
+        if graph.get_flow(edge) > 0
+    ]
+
+
+def determine_ping_pong_matchups(
+    data: DataRegistry, other_matches: Iterable[Match] | None = None
+) -> list[tuple[Subteam, Subteam]]:
+    """Pair each ping pong player with one player of each of the other teams, such
+    that the players of a matchup share as many days as possible.
+
+    Parameters
+    ----------
+    data : DataRegistry
+        The registry to take the subteams and player availabilities from.
+    other_matches : Iterable[Match] | None, optional
+        The matches of the other sports, to prefer common days on which neither
+        player is busy otherwise, by default the matches of the registry.
+
+    Returns
+    -------
+    list[tuple[Subteam, Subteam]]
+        The matchups, in the same orientation as `create_combinations`
+        (A vs B, B vs C, C vs A).
+    """
+    if other_matches is None:
+        other_matches = [m for m in data.matches if m.sport != "ping_pong"]
+    team_subteams = _get_team_subteams(data)
+    availability = PlayerAvailability.from_data(data.players, other_matches)
+    all_players = [
+        subteam.players[0]
+        for subteams in team_subteams.values()
+        for subteam in subteams
+    ]
+    days = {player: availability.get_ping_pong_days(player) for player in all_players}
+    busy_days = {player: availability.get_busy_days(player) for player in all_players}
+    costs: dict[tuple[str, str], float] = {}
+    for player_x in all_players:
+        for player_y in all_players:
+            common = days[player_x] & days[player_y]
+            free = common - busy_days[player_x] - busy_days[player_y]
+            costs[(player_x, player_y)] = (
+                4 / len(common) + 2 / (1 + len(free))
+                if len(common) > 0
+                else _NO_COMMON_DAY_COST
+            )
+    letters = sorted(team_subteams)
+    matchups = []
+    # The opponent of each player in the previous matchings
+    partners: dict[str, list[str]] = {player: [] for player in all_players}
+    for k, letter_x in enumerate(letters):
+        letter_y = letters[(k + 1) % len(letters)]
+        # Closing a triangle would have three players only play each other
+        banned = {
+            (player_x, player_z)
+            for player_y in partners
+            for player_x in partners[player_y]
+            for player_z in partners[player_y]
+            if player_x != player_z
+        }
+        pairs = _match_teams(
+            team_subteams[letter_x], team_subteams[letter_y], costs, banned
+        )
+        for subteam_x, subteam_y in pairs:
+            player_x, player_y = subteam_x.players[0], subteam_y.players[0]
+            partners[player_x].append(player_y)
+            partners[player_y].append(player_x)
+            if costs[(player_x, player_y)] >= _NO_COMMON_DAY_COST:
+                LOGGER.warning(
+                    f"Ping pong: {player_x} and {player_y} do not have any common day."
+                )
+        matchups += pairs
+    return matchups
+
+
+def _is_free_exactly(
+    player: str,
+    start: datetime,
+    end: datetime,
+    availability: PlayerAvailability,
+    busy_times: dict[str, list[tuple[datetime, datetime]]],
+) -> bool:
+    """Whether the player is available between start and end, checking the exact
+    (buffered) times of their other matches instead of the slots of the grid."""
+    rows = availability.get_rows([player])
+    day = start.weekday()
+    if len(rows) > 0 and day < availability.available_days.shape[1]:
+        if not availability.available_days[rows[0], day]:
+            return False
+    return not any(
+        other_start < end and start < other_end
+        for other_start, other_end in busy_times.get(player, [])
+    )
+
+
+def _get_cell_costs(
+    matchup: tuple[Subteam, Subteam],
+    slots: list[tuple[datetime, datetime]],
+    free_masks: np.ndarray,
+    availability: PlayerAvailability,
+    busy_times: dict[str, list[tuple[datetime, datetime]]],
+) -> dict[int, float]:
+    """The slots the given matchup can take place in, with a cost that is lower on
+    days the players are not busy otherwise."""
+    players = [subteam.players[0] for subteam in matchup]
+    common = availability.get_ping_pong_days(players[0])
+    common &= availability.get_ping_pong_days(players[1])
+    busy_days = availability.get_busy_days(players[0])
+    busy_days |= availability.get_busy_days(players[1])
+    rows = availability.get_rows(players)
+    costs = {}
+    for i, (start, end) in enumerate(slots):
+        weekday = start.strftime("%A").lower()
+        if weekday not in common:
+            continue
+        # The grid rounds the other matches out to whole slots, so it may count a
+        # player as busy in a slot that only touches their match
+        if not free_masks[i, rows].all() and not all(
+            _is_free_exactly(player, start, end, availability, busy_times)
+            for player in players
+        ):
+            continue
+        costs[i] = 1.0 if weekday in busy_days else 0.0
+    return costs
+
+
+def schedule_ping_pong_matches(
+    data: DataRegistry,
+    other_matches: Iterable[Match] | None = None,
+    matchups: list[tuple[Subteam, Subteam]] | None = None,
+    buffer_in_minutes: int = 15,
+    max_rounds: int = 50,
+) -> PingPongSchedule:
+    """Schedule the ping pong matches into the (day, slot, table) cells of the week.
+
+    Parameters
+    ----------
+    data : DataRegistry
+        The registry to take the ping pong event, subteams and players from.
+    other_matches : Iterable[Match] | None, optional
+        The already scheduled matches of all other sports, which the ping pong
+        matches must not collide with, by default the matches of the registry.
+    matchups : list[tuple[Subteam, Subteam]] | None, optional
+        The matchups to schedule, by default determined via
+        `determine_ping_pong_matchups`.
+    buffer_in_minutes : int, optional
+        The time players have at least to switch between ping pong and their
+        other matches, by default 15
+    max_rounds : int, optional
+        How often the packing is re-solved to remove clashes between ping pong
+        matches of the same player, by default 50
+
+    Returns
+    -------
+    PingPongSchedule
+        The scheduled matches, and the matchups that could not be scheduled.
+    """
+    event = data.sport_events["ping_pong"]
+    if other_matches is None:
+        other_matches = data.matches
+    other_matches = [m for m in other_matches if m.sport != "ping_pong"]
+    if matchups is None:
+        matchups = determine_ping_pong_matchups(data, other_matches)
+    availability = PlayerAvailability.from_data(data.players, other_matches)
+    slots = get_match_slots(event)
+    buffer = timedelta(minutes=buffer_in_minutes)
+    # Whether each player is free in each slot, including the buffer around it
+    free_masks = np.array(
+        [
+            availability.get_free_mask(start - buffer, end + buffer)
+            for start, end in slots
+        ]
+    )
+    busy_times: dict[str, list[tuple[datetime, datetime]]] = {}
+    for match_ in other_matches:
+        for player in match_.involved_players:
+            busy_times.setdefault(player, []).append(
+                match_.get_buffered_timetuple(buffer_in_minutes)
+            )
+    cell_costs = [
+        _get_cell_costs(matchup, slots, free_masks, availability, busy_times)
+        for matchup in matchups
+    ]
+    assignment: dict[int, int] = {}
+    for _ in range(max_rounds):
+        assignment = _pack_matches(cell_costs, len(slots), event.num_pitches)
+        clashes = _find_player_clashes(matchups, assignment)
+        if len(clashes) == 0:
+            break
+        # Ban the later scheduled matchup of each clash from its slot and try again
+        for i in clashes:
+            del cell_costs[i][assignment[i]]
+    else:
+        for i in _find_player_clashes(matchups, assignment):
+            del assignment[i]
+    num_used = np.zeros(len(slots), dtype=int)
+    schedule = PingPongSchedule()
+    for i, matchup in enumerate(matchups):
+        if i not in assignment:
+            LOGGER.warning(
+                f"Ping pong: Couldn't find a slot for {matchup[0].players[0]} and {matchup[1].players[0]}."
+            )
+            schedule.unscheduled.append(matchup)
+            continue
+        start, end = slots[assignment[i]]
+        num_used[assignment[i]] += 1
+        schedule.matches.append(
+            Match(
+                "ping_pong",
+                start,
+                end - start,
+                matchup[0],
+                matchup[1],
+                str(num_used[assignment[i]]),
+            )
+        )
+    schedule.matches.sort(key=lambda match_: match_.start)
+    LOGGER.info(
+        f"Scheduled {len(schedule.matches)} ping pong matches, {len(schedule.unscheduled)} left unscheduled."
+    )
+    return schedule
+
+
+def _pack_matches(
+    cell_costs: list[dict[int, float]], num_slots: int, num_tables: int
+) -> dict[int, int]:
+    """Assign as many matchups as possible to a slot, with at most one match per
+    table and slot, returning the slot index of each assigned matchup."""
+    graph = MinCostFlowGraph()
+    source, sink = graph.add_node(), graph.add_node()
+    slot_nodes = [graph.add_node() for _ in range(num_slots)]
+    for node in slot_nodes:
+        # Filling up further tables gets more expensive, which spreads the matches
+        for table in range(num_tables):
+            graph.add_edge(node, sink, 1, 0.1 * table)
+    edges = []
+    for i, costs in enumerate(cell_costs):
+        matchup_node = graph.add_node()
+        graph.add_edge(source, matchup_node, 1, 0.0)
+        for slot, cost in costs.items():
+            edge = graph.add_edge(matchup_node, slot_nodes[slot], 1, cost)
+            edges.append((edge, i, slot))
+    graph.solve(source, sink)
+    return {i: slot for edge, i, slot in edges if graph.get_flow(edge) > 0}
+
+
+def _find_player_clashes(
+    matchups: list[tuple[Subteam, Subteam]], assignment: dict[int, int]
+) -> list[int]:
+    """The matchups whose player already plays another matchup in the same slot."""
+    seen: set[tuple[str, int]] = set()
+    clashes = []
+    for i, slot in sorted(assignment.items()):
+        keys = {(subteam.players[0], slot) for subteam in matchups[i]}
+        if not seen.isdisjoint(keys):
+            clashes.append(i)
+        seen |= keys
+    return clashes
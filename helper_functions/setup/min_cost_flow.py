@@ -0,0 +1,70 @@
+"""A minimal min-cost flow solver for the assignment problems in the setup,
+e.g. assigning players to subteams or matches to time slots.
+"""
+
+from __future__ import annotations
+
+import heapq
+
+import numpy as np
+
+
+class MinCostFlowGraph:
+    """Small min-cost flow solver using successive shortest paths (Dijkstra with
+    potentials). All costs need to be non-negative initially. A single unit of flow
+    is sent along each shortest path, which suits the assignment problems here."""
+
+    def __init__(self):
+        self._edges: list[list[list]] = []
+        """The adjacency list, each edge as [target, residual capacity, cost, reverse index]."""
+
+    def add_node(self) -> int:
+        self._edges.append([])
+        return len(self._edges) - 1
+
+    def add_edge(self, source: int, target: int, capacity: int, cost: float) -> list:
+        """Add an edge, returning it so its flow can be read after solving."""
+        edge = [target, capacity, cost, len(self._edges[target])]
+        self._edges[source].append(edge)
+        self._edges[target].append([source, 0, -cost, len(self._edges[source]) - 1])
+        return edge
+
+    def get_flow(self, edge: list) -> int:
+        """The flow sent along the given edge."""
+        return self._edges[edge[0]][edge[3]][1]
+
+    def solve(self, source: int, sink: int) -> int:
+        """Send as much flow as possible from source to sink at minimum cost,
+        returning the total flow."""
+        num_nodes = len(self._edges)
+        potentials = [0.0] * num_nodes
+        total_flow = 0
+        while True:
+            dist = [np.inf] * num_nodes
+            prev: list[tuple[int, int] | None] = [None] * num_nodes
+            dist[source] = 0.0
+            heap = [(0.0, source)]
+            while heap:
+                d, node = heapq.heappop(heap)
+                if d > dist[node]:
+                    continue
+                for i, (to, cap, cost, _) in enumerate(self._edges[node]):
+                    if cap <= 0:
+                        continue
+                    new_dist = d + cost + potentials[node] - potentials[to]
+                    if new_dist < dist[to] - 1e-9:
+                        dist[to] = new_dist
+                        prev[to] = (node, i)
+                        heapq.heappush(heap, (new_dist, to))
+            if dist[sink] == np.inf:
+                return total_flow
+            for node in range(num_nodes):
+                potentials[node] += min(dist[node], dist[sink])
+            node = sink
+            while node != source:
+                prev_node, i = prev[node]  # type: ignore
+                edge = self._edges[prev_node][i]
+                edge[1] -= 1
+                self._edges[node][edge[3]][1] += 1
+                node = prev_node
+            total_flow += 1
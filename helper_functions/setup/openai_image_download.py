@@ -3,17 +3,22 @@ None of this should be exported to not create openai dependencies.
 """
 
 import base64
+import hashlib
 import io
+import json
 import os
 import random
 import time
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from pathlib import Path
-from typing import Literal
+from typing import Callable, Literal
 
 import openai
 from PIL import Image
 
 from ..constants import DATAPATH
+from ..logger import LOGGER
 
 
 # define a retry decorator
@@ -63,8 +68,59 @@ def retry_with_exponential_backoff(
     return wrapper
 
 
-@retry_with_exponential_backoff
-def generate_image_with_dall_e(
+class TokenBucket:
+    """Thread-safe token bucket to limit the rate of requests across several workers.
+
+    Each request takes a token, and tokens are refilled at a constant rate up to
+    the capacity. Without a rate, tokens are never used up. Upon hitting a rate
+    limit, the bucket can be paused, which makes all workers wait instead of only
+    the one that was rejected.
+    """
+
+    def __init__(self, rate_per_minute: float | None, capacity: int = 1):
+        self.rate = rate_per_minute / 60 if rate_per_minute is not None else None
+        self.capacity = capacity
+        self._tokens = float(capacity)
+        self._last_refill = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float):
+        if self.rate is None:
+            self._tokens = float(self.capacity)
+            self._last_refill = now
+            return
+        self._tokens = min(
+            self.capacity, self._tokens + (now - self._last_refill) * self.rate
+        )
+        self._last_refill = now
+
+    def acquire(self):
+        """Block until a token is available, and take it."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                if now >= self._paused_until:
+                    self._refill(now)
+                    if self._tokens >= 1:
+                        self._tokens -= 1
+                        return
+                    wait = (1 - self._tokens) / self.rate  # type: ignore
+                else:
+                    wait = self._paused_until - now
+            time.sleep(wait)
+
+    def pause(self, seconds: float):
+        """Stop handing out tokens for the given time, e.g. after a rate limit error."""
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            self._tokens = 0
+            self._paused_until = max(self._paused_until, now + seconds)
+            self._last_refill = self._paused_until
+
+
+def _generate_image_with_dall_e(
     prompt: str,
     size: Literal["1024x1024", "1792x1024", "1024x1792"] = "1024x1024",
     dall_e_version: Literal[2, 3] = 3,
@@ -87,8 +143,65 @@ def generate_image_with_dall_e(
     )
 
 
+generate_image_with_dall_e = retry_with_exponential_backoff(_generate_image_with_dall_e)
+
+ImageBackend = Callable[[str], Image.Image]
+"""Function generating an image for a given prompt."""
+
+
+def _generate_with_limiter(
+    backend: ImageBackend,
+    prompt: str,
+    limiter: TokenBucket,
+    retry_errors: tuple,
+    initial_delay: float = 1,
+    exponential_base: float = 2,
+    max_retries: int = 10,
+) -> Image.Image:
+    """Generate an image, taking a token for each attempt and pausing all
+    workers with exponential backoff when hitting the rate limit."""
+    delay = initial_delay
+    for _ in range(max_retries + 1):
+        limiter.acquire()
+        try:
+            return backend(prompt)
+        except retry_errors:
+            delay *= exponential_base * (1 + random.random())
+            limiter.pause(delay)
+    raise Exception(f"Maximum number of retries ({max_retries}) exceeded.")
+
+
+def _get_new_image_path(
+    animal_name: str, redo_anyways: bool, verbose: bool
+) -> Path | None:
+    """The path to write the image for the given animal to, or None if it exists already."""
+    img_name = animal_name.replace(" ", "_").lower() + ".png"
+    full_path = DATAPATH.joinpath(f"assets/animal_pics/full_size/{img_name}")
+    if full_path.exists():
+        if not redo_anyways:
+            if verbose:
+                print(f"Image for {animal_name} already exists, skipping.")
+            return None
+        for i in range(10):
+            full_path = Path(str(full_path).replace(".png", f"{i}.png"))
+            if not full_path.exists():
+                if verbose:
+                    print(
+                        f"Initial path for {animal_name} already existed, writing to {full_path} instead."
+                    )
+                break
+    return full_path
+
+
 def generate_all_images(
-    animal_names: list[str], verbose=True, redo_anyways=False
+    animal_names: list[str],
+    verbose=True,
+    redo_anyways=False,
+    backend: ImageBackend | None = None,
+    max_workers: int = 1,
+    requests_per_minute: float | None = None,
+    retry_errors: tuple = (openai.RateLimitError,),
+    checkpoint_path: Path | None = None,
 ) -> list[Path]:
     """Generate an image for each animal in animal names.
 
@@ -100,6 +213,22 @@ def generate_all_images(
         Whether to print the prompt, by default True
     redo_anyways : bool, optional
         Whether to generate the image even if it already exists, by default False
+    backend : ImageBackend | None, optional
+        The function generating an image for a prompt, by default dall-e.
+        Can be replaced by a local stub, e.g. for testing.
+    max_workers : int, optional
+        The maximum number of images generated concurrently, by default 1
+    requests_per_minute : float | None, optional
+        The rate limit shared by all workers, e.g. 5 for the dall-e-3 limit of the
+        lowest usage tier. By default None, i.e. requests are only slowed down
+        after hitting the rate limit.
+    retry_errors : tuple, optional
+        The errors upon which all workers pause and the request is retried,
+        by default openai's rate limit error.
+    checkpoint_path : Path | None, optional
+        File to keep track of the finished animals, so that an interrupted batch
+        can be resumed. By default, it is placed next to the full size images,
+        and it is removed once all images have been generated.
 
     Returns
     -------
@@ -109,50 +238,157 @@ def generate_all_images(
     assert isinstance(
         animal_names, list
     ), f"The animal names are expected to be a list, not {type(animal_names)}"
-    newly_added = []
+    backend = backend if backend is not None else _generate_image_with_dall_e
+    if checkpoint_path is None:
+        checkpoint_path = DATAPATH.joinpath(
+            "assets/animal_pics/generation_checkpoint.json"
+        )
+    completed: dict[str, str] = (
+        json.loads(checkpoint_path.read_text()) if checkpoint_path.exists() else {}
+    )
     prompt_base = (
         "Create an avatar showing a '{}' (the animal) with a white background."
     )
+    jobs: list[tuple[str, str, Path]] = []
     for animal_name in animal_names:
-        prompt = prompt_base.format(animal_name)
-        img_name = animal_name.replace(" ", "_").lower() + ".png"
-        full_path = DATAPATH.joinpath(f"assets/animal_pics/full_size/{img_name}")
-        if full_path.exists():
-            if not redo_anyways:
-                if verbose:
-                    print(f"Image for {animal_name} already exists, skipping.")
-                continue
-            for i in range(10):
-                full_path = Path(str(full_path).replace(".png", f"{i}.png"))
-                if not full_path.exists():
-                    if verbose:
-                        print(
-                            f"Initial path for {animal_name} already existed, writing to {full_path} instead."
-                        )
-                    break
+        if Path(completed.get(animal_name, "")).is_file():
+            if verbose:
+                print(
+                    f"Image for {animal_name} was generated in an earlier run,"
+                    " skipping."
+                )
+            continue
+        full_path = _get_new_image_path(animal_name, redo_anyways, verbose)
+        if full_path is not None:
+            jobs.append((animal_name, prompt_base.format(animal_name), full_path))
+
+    limiter = TokenBucket(requests_per_minute, capacity=max_workers)
+    checkpoint_lock = threading.Lock()
+
+    def generate(job: tuple[str, str, Path]) -> Path:
+        animal_name, prompt, full_path = job
         if verbose:
             print(prompt)
-        img = generate_image_with_dall_e(prompt)
-        img.save(full_path)
-        newly_added.append(full_path)
+        img = _generate_with_limiter(backend, prompt, limiter, retry_errors)
+        # Write atomically so an interrupted run doesn't leave broken images behind
+        tmp_path = full_path.with_name(f".{full_path.name}.tmp")
+        img.save(tmp_path, format="PNG")
+        os.replace(tmp_path, full_path)
+        with checkpoint_lock:
+            completed[animal_name] = str(full_path)
+            checkpoint_path.parent.mkdir(parents=True, exist_ok=True)
+            checkpoint_path.write_text(json.dumps(completed, indent=1))
+        return full_path
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        newly_added = list(executor.map(generate, jobs))
+    # Everything went through, so there's nothing to resume
+    checkpoint_path.unlink(missing_ok=True)
     return newly_added
 
 
-def save_resized_animal_images(new_size: int = 150):
+def _hash_file(fpath: Path) -> str:
+    return hashlib.sha256(fpath.read_bytes()).hexdigest()
+
+
+def _has_size(fpath: Path, size: int) -> bool:
+    """Whether the image has the given pixel size, only reading its header."""
+    with Image.open(fpath) as img:
+        return img.size == (size, size)
+
+
+def _resize_image(full_path: Path, new_path: Path, new_size: int) -> Path:
+    """Resize a single image, writing it atomically to the new path."""
+    tmp_path = new_path.with_name(f".{new_path.name}.tmp")
+    with open(full_path, "rb") as f:
+        img = Image.open(f)
+        img_format = img.format
+        img = img.resize((new_size, new_size))
+        img.save(tmp_path, format=img_format)
+    os.replace(tmp_path, new_path)
+    return new_path
+
+
+def save_resized_animal_images(
+    new_size: int = 150,
+    max_workers: int | None = None,
+    check_hashes: bool = False,
+    redo_anyways: bool = False,
+    verbose: bool = True,
+) -> list[Path]:
     """Save all images in the full size directory with a new pixel size in
     the small size directory.
     150 seems to be a good size for all avatars to load if necessary.
+
+    Only images whose output is missing, outdated or of a different size are
+    resized, spread over a process pool.
+
+    Parameters
+    ----------
+    new_size : int, optional
+        The new pixel size, by default 150
+    max_workers : int | None, optional
+        The number of processes to resize with, by default one per CPU.
+    check_hashes : bool, optional
+        Whether to determine outdated outputs by the content hash of the full size
+        image (and the new size) instead of the modification times, by default False
+    redo_anyways : bool, optional
+        Whether to resize all images even if they are up to date, by default False
+    verbose : bool, optional
+        Whether to log the throughput, by default True
+
+    Returns
+    -------
+    list[Path]
+        List of paths to the newly written images.
     """
     assert 50 <= new_size < 1024, f"Please provide sensible new size, not {new_size}"
     base_dir = DATAPATH.joinpath("assets/animal_pics/full_size")
+    out_dir = DATAPATH.parent.joinpath("static/animal_pics/small_size/")
+    hash_path = base_dir.parent.joinpath("resized_hashes.json")
+    hashes: dict[str, str] = (
+        json.loads(hash_path.read_text()) if check_hashes and hash_path.exists() else {}
+    )
+    start = time.perf_counter()
+    todo: list[tuple[Path, Path]] = []
+    num_images = 0
     for full_path in base_dir.iterdir():
         if full_path.is_dir():
             continue
-        new_path = (
-            DATAPATH.parent.joinpath("static/animal_pics/small_size/")
-            / full_path.name.lower()
+        num_images += 1
+        new_path = out_dir / full_path.name.lower()
+        if check_hashes:
+            content_hash = f"{_hash_file(full_path)}_{new_size}"
+            is_up_to_date = (
+                new_path.exists() and hashes.get(full_path.name) == content_hash
+            )
+            hashes[full_path.name] = content_hash
+        else:
+            is_up_to_date = (
+                new_path.exists()
+                and new_path.stat().st_mtime >= full_path.stat().st_mtime
+                and _has_size(new_path, new_size)
+            )
+        if redo_anyways or not is_up_to_date:
+            todo.append((full_path, new_path))
+    if max_workers == 1 or len(todo) <= 1:
+        written = [_resize_image(full, new, new_size) for full, new in todo]
+    else:
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            written = list(
+                executor.map(
+                    _resize_image,
+                    [full for full, _ in todo],
+                    [new for _, new in todo],
+                    [new_size] * len(todo),
+                )
+            )
+    if check_hashes:
+        hash_path.write_text(json.dumps(hashes, indent=1))
+    if verbose:
+        duration = time.perf_counter() - start
+        rate = len(written) / duration if duration > 0 else 0
+        LOGGER.info(
+            f"Resized {len(written)} of {num_images} images in {duration:.1f} s ({rate:.1f} images/s), the others were up to date."
         )
-        with open(full_path, "rb") as f:
-            img = Image.open(f)
-            img = img.resize((new_size, new_size))
-            img.save(new_path)
+    return written
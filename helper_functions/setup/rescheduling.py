@@ -0,0 +1,192 @@
+"""Live rescheduling of single matches, e.g. when a court becomes unavailable.
+
+Each player keeps a list of their matches sorted by start time. When a match is
+moved (or two matches are swapped), only the players of the affected matches are
+re-checked against their own lists, so finding out whether a change broke
+anything does not require checking the whole schedule via `find_hard_collisions`.
+"""
+
+from __future__ import annotations
+
+import bisect
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Iterable
+
+from ..classes.match import Match
+from ..logger import LOGGER
+from .collision_detection import Collision
+
+
+@dataclass
+class ConflictDelta:
+    """The change in hard collisions caused by a rescheduling operation."""
+
+    added: list[Collision] = field(default_factory=list)
+    """The collisions the operation introduced."""
+
+    removed: list[Collision] = field(default_factory=list)
+    """The collisions the operation resolved."""
+
+    elapsed_us: float = 0.0
+    """The time it took to apply the operation and re-check the players, in µs."""
+
+    @property
+    def net_change(self) -> int:
+        """The change in the number of collisions."""
+        return len(self.added) - len(self.removed)
+
+    @property
+    def description(self) -> str:
+        lines = [f"{self.net_change:+d} collisions ({self.elapsed_us:.0f} µs)"]
+        lines += [f"+ {collision.description}" for collision in self.added]
+        lines += [f"- {collision.description}" for collision in self.removed]
+        return "\n".join(lines)
+
+
+@dataclass
+class _Operation:
+    """The previous start and location of the matches changed by an operation."""
+
+    matches: list[Match]
+    starts: list[datetime]
+    locations: list[str]
+
+
+class RescheduleSession:
+    """Applies moves and swaps to a schedule, re-checking only the affected players.
+
+    Parameters
+    ----------
+    matches : Iterable[Match]
+        The matches of the schedule, which are changed in place.
+    buffer_in_minutes : int, optional
+        Transition time that is added before and after each match, by default 0
+        (as in `find_hard_collisions`).
+    """
+
+    def __init__(self, matches: Iterable[Match], buffer_in_minutes: int = 0):
+        self.buffer = timedelta(minutes=buffer_in_minutes)
+        self._player_matches: dict[str, list[tuple[datetime, int, Match]]] = {}
+        """The (start, id, match) of each player's matches, sorted by start."""
+        self._history: list[_Operation] = []
+        for match_ in matches:
+            self._insert(match_)
+
+    def _insert(self, match_: Match):
+        for player in dict.fromkeys(match_.involved_players):
+            entries = self._player_matches.setdefault(player, [])
+            bisect.insort(entries, (match_.start, id(match_), match_))
+
+    def _remove(self, match_: Match):
+        for player in dict.fromkeys(match_.involved_players):
+            entries = self._player_matches[player]
+            entries.pop(bisect.bisect_left(entries, (match_.start, id(match_))))
+
+    def _get_overlapping(self, match_: Match, player: str) -> list[Match]:
+        """The other matches of the player overlapping with the given match."""
+        entries = self._player_matches.get(player, [])
+        start, end = match_.start - self.buffer, match_.end + self.buffer
+        # Matches starting after the (buffered) end can't overlap
+        last = bisect.bisect_left(entries, (end + self.buffer,))
+        return [
+            other
+            for _, _, other in entries[:last]
+            if other is not match_
+            and other.end + self.buffer > start
+            and not match_.sport == other.sport == "running_sprints"
+        ]
+
+    def get_collisions(self, matches: Iterable[Match]) -> dict[tuple, Collision]:
+        """The current collisions the given matches are part of, keyed by the ids of
+        the two matches."""
+        collisions: dict[tuple, Collision] = {}
+        for match_ in matches:
+            for player in dict.fromkeys(match_.involved_players):
+                for other in self._get_overlapping(match_, player):
+                    first, second = sorted(
+                        (match_, other), key=lambda m: (m.start, id(m))
+                    )
+                    collision = collisions.setdefault(
+                        (id(first), id(second)), Collision(first, second)
+                    )
+                    collision.players.add(player)
+        return collisions
+
+    def _apply(
+        self, matches: list[Match], starts: list[datetime], locations: list[str]
+    ) -> ConflictDelta:
+        """Set the new starts and locations of the given matches, returning the
+        change in collisions."""
+        t_start = time.perf_counter()
+        before = self.get_collisions(matches)
+        for match_, start, location in zip(matches, starts, locations):
+            self._remove(match_)
+            match_.start = start
+            match_.location = location
+            self._insert(match_)
+        after = self.get_collisions(matches)
+        elapsed_us = (time.perf_counter() - t_start) * 1e6
+        return ConflictDelta(
+            added=[
+                collision
+                for key, collision in after.items()
+                if key not in before or collision.players != before[key].players
+            ],
+            removed=[
+                collision
+                for key, collision in before.items()
+                if key not in after or collision.players != after[key].players
+            ],
+            elapsed_us=elapsed_us,
+        )
+
+    def _record(self, matches: list[Match]):
+        self._history.append(
+            _Operation(
+                matches,
+                [match_.start for match_ in matches],
+                [match_.location for match_ in matches],
+            )
+        )
+
+    def move(
+        self, match_: Match, start: datetime, location: str | None = None
+    ) -> ConflictDelta:
+        """Move the given match to a new start time (and location, if given)."""
+        self._record([match_])
+        location = location if location is not None else match_.location
+        delta = self._apply([match_], [start], [location])
+        LOGGER.info(
+            f"Moved {match_.match_key} to {start.strftime('%H:%M, %A')} at {location}: {delta.net_change:+d} collisions."
+        )
+        return delta
+
+    def swap(self, match_a: Match, match_b: Match) -> ConflictDelta:
+        """Swap the start times and locations of two matches of the same sport,
+        as `Match.switch_with_other` does."""
+        assert (
+            match_a.sport == match_b.sport
+        ), "Can only switch matches of the same sport"
+        self._record([match_a, match_b])
+        delta = self._apply(
+            [match_a, match_b],
+            [match_b.start, match_a.start],
+            [match_b.location, match_a.location],
+        )
+        LOGGER.info(
+            f"Switched {match_a.match_key} with {match_b.match_key}: {delta.net_change:+d} collisions."
+        )
+        return delta
+
+    def undo(self) -> ConflictDelta:
+        """Revert the latest move or swap that has not been undone yet."""
+        if len(self._history) == 0:
+            raise ValueError("There is no operation to undo.")
+        operation = self._history.pop()
+        return self._apply(operation.matches, operation.starts, operation.locations)
+
+    @property
+    def can_undo(self) -> bool:
+        return len(self._history) > 0
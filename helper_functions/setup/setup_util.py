@@ -1,36 +1,78 @@
+from collections import Counter
 from typing import TYPE_CHECKING
 
 import pandas as pd
 
-from ..constants import DATAPATH, FpathRegistry
+from ..constants import CURRENT_YEAR, DATAPATH, FpathRegistry
 
 if TYPE_CHECKING:
     from ..classes.team import Team
 
 
+class RealNameResolver:
+    """Resolves nicknames to the real names from the hidden responses.
+
+    The hidden responses are only read again once their modification time
+    changes, and the first names that occur more than once are determined
+    when reading them.
+    """
+
+    def __init__(self, year: int = CURRENT_YEAR):
+        self.year = year
+        self._mtime: int | None = None
+        self._names: dict[str, str] = {}
+        self._emails: dict[str, str] = {}
+        self._first_name_counts: Counter[str] = Counter()
+
+    def _get_mtime(self) -> int | None:
+        fpath = FpathRegistry.get_path_responses(self.year, sanitized=False)
+        try:
+            return fpath.stat().st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+    def _refresh(self) -> bool:
+        """Reload the hidden responses if they changed, and return whether
+        they are available at all."""
+        mtime = self._get_mtime()
+        if mtime is None:
+            return False
+        if mtime != self._mtime:
+            clear_names = FpathRegistry.get_hidden_responses(self.year)
+            self._names = dict(zip(clear_names["nickname"], clear_names["name"]))
+            self._emails = dict(zip(clear_names["nickname"], clear_names["email"]))
+            self._first_name_counts = Counter(
+                name.split()[0] for name in clear_names["name"]
+            )
+            self._mtime = mtime
+        return True
+
+    def get_real_name(self, nickname: str, first_name_only: bool = True) -> str:
+        """Try to retrieve this player's real name from the hidden data."""
+        if not self._refresh():
+            return nickname
+        name = self._names.get(nickname, "")
+        email_suffix = ", " + self._emails.get(nickname, "")
+        if not first_name_only:
+            return name + email_suffix
+        first_name = name.split()[0]
+        last_name = name.split()[-1] if len(name.split()) > 1 else ""
+        if (
+            self._first_name_counts[first_name] > 1 and last_name
+        ):  # If the first name is not unique and there is a last name
+            return (
+                first_name + " " + last_name[0] + email_suffix
+            )  # Return the first name and the first letter of the last name
+        else:
+            return first_name + email_suffix
+
+
+_REAL_NAME_RESOLVER = RealNameResolver()
+
+
 def get_real_player_name(nickname: str, first_name_only: bool = True) -> str:
     """Try to retrieve this player's real name from the hidden data."""
-    try:
-        clear_names = FpathRegistry.get_hidden_responses().set_index(
-            "nickname", drop=False
-        )
-    except FileNotFoundError:
-        return nickname
-    name = clear_names["name"].to_dict().get(nickname, "")
-    email_suffix = ", " + clear_names["email"].to_dict().get(nickname, "")
-    if not first_name_only:
-        return name + email_suffix
-    first_name = name.split()[0]
-    last_name = name.split()[-1] if len(name.split()) > 1 else ""
-    first_names = [n.split()[0] for n in clear_names["name"]]
-    if (
-        first_names.count(first_name) > 1 and last_name
-    ):  # If the first name is not unique and there is a last name
-        return (
-            first_name + " " + last_name[0] + email_suffix
-        )  # Return the first name and the first letter of the last name
-    else:
-        return first_name + email_suffix
+    return _REAL_NAME_RESOLVER.get_real_name(nickname, first_name_only)
 
 
 def update_player_signup_status(
@@ -0,0 +1,89 @@
+"""Detection of sports that take place at the same time, based on their time windows.
+
+Multi-day events (like ping pong) are split into one window per day. All windows
+are swept through in order of their start time, keeping the ones still running in
+a heap, which finds all overlaps in O(n log n + k) for n windows and k overlaps.
+"""
+
+from __future__ import annotations
+
+import heapq
+from datetime import date, datetime
+from typing import TYPE_CHECKING, Iterable
+
+if TYPE_CHECKING:
+    from ..classes.sport_event import SportEvent
+
+
+def find_overlapping_days(
+    sport_events: Iterable[SportEvent],
+) -> dict[tuple[str, str], set[date]]:
+    """Find the days on which the windows of each pair of sports overlap.
+
+    Returns
+    -------
+    dict[tuple[str, str], set[date]]
+        The overlapping days for each pair of sports (sorted alphabetically)
+        that overlap at least once.
+    """
+    windows = sorted(
+        (start, end, event.sanitized_name)
+        for event in sport_events
+        for start, end in event.time_windows
+    )
+    # The end time and sport of the windows that have started but not ended yet
+    active: list[tuple[datetime, str]] = []
+    overlaps: dict[tuple[str, str], set[date]] = {}
+    for start, end, sport in windows:
+        while len(active) > 0 and active[0][0] <= start:
+            heapq.heappop(active)
+        for _, other in active:
+            if other != sport:
+                pair = (min(sport, other), max(sport, other))
+                overlaps.setdefault(pair, set()).add(start.date())
+        heapq.heappush(active, (end, sport))
+    return overlaps
+
+
+def get_conflict_graph(
+    sport_events: Iterable[SportEvent], include_declared: bool = True
+) -> dict[str, set[str]]:
+    """The sports that each sport is conflicting with.
+
+    Two sports conflict if they overlap on every day on which either of them
+    takes place. A multi-day event that has a free day besides the overlap
+    (e.g. ping pong during the week) therefore does not conflict, as its matches
+    can be moved to other days.
+
+    Parameters
+    ----------
+    sport_events : Iterable[SportEvent]
+        The sports to check.
+    include_declared : bool, optional
+        Whether to add the conflicts given by `SportEvent.conflicting_sports`,
+        by default True
+
+    Returns
+    -------
+    dict[str, set[str]]
+        The conflicting sports for each sport (symmetric).
+    """
+    events = {event.sanitized_name: event for event in sport_events}
+    days = {
+        sport: {start.date() for start, _ in event.time_windows}
+        for sport, event in events.items()
+    }
+    graph: dict[str, set[str]] = {sport: set() for sport in events}
+    for (sport_a, sport_b), overlap_days in find_overlapping_days(
+        events.values()
+    ).items():
+        if overlap_days >= days[sport_a] | days[sport_b]:
+            graph[sport_a].add(sport_b)
+            graph[sport_b].add(sport_a)
+    if include_declared:
+        for sport, event in events.items():
+            for other in event.conflicting_sports:
+                if other in graph:
+                    graph[sport].add(other)
+                    graph[other].add(sport)
+    return graph
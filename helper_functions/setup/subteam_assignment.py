@@ -0,0 +1,234 @@
+"""Assignment of the players of a team to the subteams of all sports at once.
+
+The assignment is solved as a min-cost flow, where each unit of flow is a player
+getting an active (non-reserve) spot for a sport:
+
+    source -> player -> (player, conflict group) -> (player, sport) -> sport -> sink
+
+Sports that overlap in time (see `get_conflict_graph`) are grouped, and each
+(player, conflict group) node has a capacity of one, so a player is never active
+in two conflicting sports. Only if a sport could not be filled otherwise,
+a heavily penalized edge allows doubly booking a player, for which a warning is
+logged.
+The costs favour spreading the spots over as many players as possible, players
+attending few sports, and (when re-running after dropouts) keeping players in the
+subteams they were in before.
+"""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Iterable
+
+import numpy as np
+
+from ..classes.subteam import Subteam
+from ..logger import LOGGER
+from .min_cost_flow import MinCostFlowGraph
+from .sport_conflicts import get_conflict_graph
+
+if TYPE_CHECKING:
+    from ..classes.sport_event import SportEvent
+    from ..classes.team import Team
+
+_SPREAD_COST = 1.0
+"""The additional cost for each further active spot a player gets."""
+
+_KEEP_BONUS = 3.0
+"""The reduction in cost for keeping a player active in a sport they were active in before."""
+
+_DOUBLE_BOOKING_COST = 100.0
+"""The cost for making a player active in two conflicting sports."""
+
+
+def get_conflict_groups(conflict_graph: dict[str, set[str]]) -> dict[str, int]:
+    """Group the sports such that conflicting sports end up in the same group,
+    returning the group index of each sport.
+    Groups are the connected components of the conflict graph, so for conflicts that
+    do not form a clique (A overlaps B, B overlaps C, but not A and C), limiting a
+    player to one sport per group is stricter than necessary."""
+    sports = list(conflict_graph)
+    parents = {sport: sport for sport in sports}
+
+    def find(sport: str) -> str:
+        while parents[sport] != sport:
+            parents[sport] = parents[parents[sport]]
+            sport = parents[sport]
+        return sport
+
+    for sport, others in conflict_graph.items():
+        for other in others:
+            if other in parents:
+                parents[find(other)] = find(sport)
+    roots = list(dict.fromkeys(find(sport) for sport in sports))
+    return {sport: roots.index(find(sport)) for sport in sports}
+
+
+def _get_sub_keys(event: SportEvent) -> list[str]:
+    return [
+        str(i + 1) if event.sanitized_name != "ping_pong" else f"{i+1:0>2}"
+        for i in range(event.num_subteams)
+    ]
+
+
+def _split_into_subteams(
+    event: SportEvent,
+    team_letter: str,
+    active_players: list[str],
+    reserve_players: list[str],
+    previous_keys: dict[str, str],
+    rng: np.random.Generator,
+) -> list[Subteam]:
+    """Distribute the active players to the subteams of the sport, keeping players in
+    their previous subteams where possible."""
+    sub_keys = _get_sub_keys(event)
+    members: dict[str, list[str]] = {key: [] for key in sub_keys}
+    unplaced = []
+    for player in active_players:
+        key = previous_keys.get(player)
+        if key in members and len(members[key]) < event.num_players_per_subteam:
+            members[key].append(player)
+        else:
+            unplaced.append(player)
+    unplaced = [unplaced[i] for i in rng.permutation(len(unplaced))]
+    for key in sub_keys:
+        num_missing = event.num_players_per_subteam - len(members[key])
+        members[key] += unplaced[:num_missing]
+        unplaced = unplaced[num_missing:]
+    subteams = [
+        Subteam(event.sanitized_name, team_letter, key, players)
+        for key, players in members.items()
+    ]
+    subteams.append(Subteam(event.sanitized_name, team_letter, "R", reserve_players))
+    return subteams
+
+
+def assign_subteams(
+    team: Team,
+    sport_events: Iterable[SportEvent],
+    previous_subteams: Iterable[Subteam] | None = None,
+    seed: int = 42,
+    conflict_graph: dict[str, set[str]] | None = None,
+) -> list[Subteam]:
+    """Assign the players of the given team to the subteams and reserves of all sports.
+
+    Parameters
+    ----------
+    team : Team
+        The team whose players are assigned.
+    sport_events : Iterable[SportEvent]
+        The sports to create subteams for.
+    previous_subteams : Iterable[Subteam] | None, optional
+        Earlier subteams of this team, e.g. when re-running after a dropout.
+        Players are kept in their previous subteams where possible.
+    seed : int, optional
+        The seed for breaking ties between equally good assignments, by default 42
+    conflict_graph : dict[str, set[str]] | None, optional
+        The conflicting sports of each sport, by default derived from the time
+        windows of the events (see `get_conflict_graph`).
+
+    Returns
+    -------
+    list[Subteam]
+        The subteams of each sport, followed by the reserve subteam of that sport.
+    """
+    events = list(sport_events)
+    rng = np.random.default_rng(seed)
+    player_df = team.player_df
+    players = player_df["nickname"].tolist()
+    num_sports = player_df["num_sports"].to_numpy(dtype=float)
+    if conflict_graph is None:
+        conflict_graph = get_conflict_graph(events)
+    conflict_groups = get_conflict_groups(
+        {event.sanitized_name: conflict_graph[event.sanitized_name] for event in events}
+    )
+    previous_keys: dict[str, dict[str, str]] = {
+        event.sanitized_name: {} for event in events
+    }
+    for subteam in previous_subteams or []:
+        if subteam.sport in previous_keys and not subteam.is_reserve:
+            for player in subteam.players:
+                previous_keys[subteam.sport][player] = subteam.sub_key
+
+    graph = MinCostFlowGraph()
+    source, sink = graph.add_node(), graph.add_node()
+    sport_nodes: dict[str, int] = {}
+    for event in events:
+        sport = event.sanitized_name
+        signed_up = player_df[sport].fillna(False).to_numpy(dtype=bool)
+        req_player_num = event.num_subteams * event.num_players_per_subteam
+        assert (
+            req_player_num <= signed_up.sum()
+        ), f"{event.name}: Not enough players (only {signed_up.sum()}) in the team to create the requested number of subteams (at least {req_player_num} expected)."
+        sport_nodes[sport] = graph.add_node()
+        graph.add_edge(sport_nodes[sport], sink, req_player_num, 0.0)
+
+    group_sizes = np.bincount(list(conflict_groups.values()))
+    num_sports_signed_up = (
+        player_df[[event.sanitized_name for event in events]].fillna(False).sum(axis=1)
+    ).to_numpy()
+    # The solver needs non-negative costs. Every path crosses exactly one
+    # (player, sport) -> sport edge, so shifting these costs by the largest possible
+    # reduction (keep bonus, sport preference and noise) doesn't change the optimum.
+    cost_offset = _KEEP_BONUS + 2.0 + 0.01
+    player_sport_edges: list[tuple[list, str, int]] = []
+    for i, player in enumerate(players):
+        player_node = graph.add_node()
+        group_nodes: dict[int, int] = {}
+        for event in events:
+            sport = event.sanitized_name
+            if not player_df[sport].iloc[i]:
+                continue
+            group = conflict_groups[sport]
+            if group not in group_nodes:
+                group_nodes[group] = graph.add_node()
+                graph.add_edge(player_node, group_nodes[group], 1, 0.0)
+            # Same preference as in the sampling, favouring players with fewer sports
+            cost = cost_offset - 2 / num_sports[i] - 0.01 * rng.random()
+            if player in previous_keys[sport]:
+                cost -= _KEEP_BONUS
+            if group_sizes[group] > 1:
+                player_sport_node = graph.add_node()
+                graph.add_edge(group_nodes[group], player_sport_node, 1, 0.0)
+                graph.add_edge(player_node, player_sport_node, 1, _DOUBLE_BOOKING_COST)
+            else:
+                player_sport_node = group_nodes[group]
+            edge = graph.add_edge(player_sport_node, sport_nodes[sport], 1, cost)
+            player_sport_edges.append((edge, sport, i))
+        for k in range(int(num_sports_signed_up[i])):
+            graph.add_edge(source, player_node, 1, k * _SPREAD_COST)
+
+    total_flow = graph.solve(source, sink)
+    active: dict[str, list[str]] = {event.sanitized_name: [] for event in events}
+    for edge, sport, i in player_sport_edges:
+        if graph.get_flow(edge) > 0:
+            active[sport].append(players[i])
+    LOGGER.debug(f"Assigned {total_flow} active spots for team {team.team_letter}.")
+
+    subteams: list[Subteam] = []
+    for event in events:
+        sport = event.sanitized_name
+        active_set = set(active[sport])
+        reserve = [
+            player
+            for player, signed_up in zip(players, player_df[sport].fillna(False))
+            if signed_up and player not in active_set
+        ]
+        subteams += _split_into_subteams(
+            event, team.team_letter, active[sport], reserve, previous_keys[sport], rng
+        )
+    _warn_about_double_bookings(active, conflict_groups)
+    return subteams
+
+
+def _warn_about_double_bookings(
+    active: dict[str, list[str]], conflict_groups: dict[str, int]
+):
+    seen: dict[tuple[str, int], str] = {}
+    for sport, players in active.items():
+        for player in players:
+            key = (player, conflict_groups[sport])
+            if key in seen:
+                LOGGER.warning(
+                    f"No solution found for {player}, they are currently double-booked for {seen[key]} and {sport}."
+                )
+            seen[key] = sport
@@ -1,4 +1,6 @@
-import warnings
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
 from random import randint
 
 import numpy as np
@@ -16,63 +18,88 @@ def swap_rows(df, i, j):
     return df
 
 
+def load_team_player_data(year=CURRENT_YEAR) -> pd.DataFrame:
+    """Load the players to distribute to the teams, sorted by the number of sports
+    they attend and excluding the late entries."""
+    player_data = pd.read_csv(FpathRegistry.get_path_responses(year)).sort_values(
+        "num_sports",
+        ascending=False,
+    )
+    return player_data[~player_data["late_entry"]]
+
+
 def create_teams(year=CURRENT_YEAR, num_teams: int = 3, seed: int = 42) -> list[Team]:
     """Create teams based on the player data.
     If a seed is given, the players are randomly shuffled before being appointed.
     If no seed is given, they are sorted by the number of sports they attend such that
     the 'easy' ones are assigned last, which seems to work out best.
     """
-    player_data = pd.read_csv(FpathRegistry.get_path_responses(year)).sort_values(
-        "num_sports",
-        ascending=False,
-    )
-    late_players = player_data[player_data["late_entry"]]
-    player_data = player_data[~player_data["late_entry"]]
+    player_data = load_team_player_data(year)
     LOGGER.info(
         f"Creating {num_teams} teams from {len(player_data)} players, excluding {np.sum(player_data["late_entry"])} late entries."
     )
     # print(player_data)
     # Some RNG manipulation for better results
     player_data = swap_rows(player_data, 9, 14)
-    teams = [Team(i) for i in range(num_teams)]
-    # I'm aware that this is not the most efficient way to do this, but it's the most readable
-    # and luckily the speed requirements are not that high.
-    for _, player in player_data.iterrows():
-        best_team_to_join = find_best_team_to_join(teams, player, num_teams, seed)
-        teams[best_team_to_join].add_player(player)
-    # If this player is moved, we are pretty golden
-    return teams
+    return _assign_players_to_teams(player_data, num_teams, seed)
 
 
-def find_best_team_to_join(
-    teams: list[Team], player: pd.Series, num_teams: int, seed: int
+def _get_balance_objectives(counts: np.ndarray) -> np.ndarray:
+    """The balance objective, i.e. the sum over all sports of the relative standard
+    deviation of the number of players between teams.
+
+    Parameters
+    ----------
+    counts : np.ndarray
+        The number of players per team and sport, of shape (..., teams, sports).
+        Leading dimensions are evaluated independently.
+
+    Returns
+    -------
+    np.ndarray
+        The objective for each of the leading dimensions (lower is better).
+        NaN if any sport does not have any players yet.
+    """
+    return _get_objective_from_moments(
+        counts.sum(axis=-2), np.square(counts).sum(axis=-2), counts.shape[-2]
+    )
+
+
+def _get_objective_from_moments(
+    sums: np.ndarray, sq_sums: np.ndarray, num_teams: int
+) -> np.ndarray:
+    """The balance objective from the sum and the sum of squares of the number of
+    players per sport. These are integers, so equivalent team setups give exactly
+    the same value."""
+    with np.errstate(divide="ignore", invalid="ignore"):
+        std = np.sqrt(np.maximum(sq_sums * num_teams - sums**2, 0)) / num_teams
+        return np.sum(std / (sums / num_teams), axis=-1)
+
+
+def _get_candidate_objectives(
+    counts: np.ndarray, player_sports: np.ndarray
+) -> np.ndarray:
+    """The balance objective after adding a player with the given sports to each of the teams.
+
+    Only the column sums and sums of squares change with the player, so each candidate
+    is evaluated as a delta on those in O(sports) instead of rebuilding all team stats.
+    """
+    num_teams = counts.shape[0]
+    sums = counts.sum(axis=0) + player_sports
+    # Adding the player to team i increases sum(c^2) by 2 c_i + 1 for each of their sports
+    sq_sums = np.square(counts).sum(axis=0) + player_sports * (2 * counts + 1)
+    return _get_objective_from_moments(sums, sq_sums, num_teams)
+
+
+def _choose_team_index(
+    equality_nums: np.ndarray, team_sizes: np.ndarray, seed: int
 ) -> int:
-    """Find the best team to add the given player to."""
-    if all(team.player_num == 0 for team in teams):
-        return 0
-    equality_nums = []
-    for i in range(num_teams):
-        equality_num = 0
-        team_stats = [
-            (
-                teams[i].get_new_stats_with_player(player)
-                if i == j
-                else teams[j].current_sports_stats
-            )
-            for j in range(num_teams)
-        ]
-        for sport in SPORTS_LIST:
-            sports_stats = [stat[sport] for stat in team_stats]
-            with warnings.catch_warnings():
-                # When I ignored the ZeroDivision here, the team creation worked out well.
-                warnings.simplefilter("ignore", RuntimeWarning)
-                equality_num += np.std(sports_stats, axis=0) / np.mean(sports_stats)
-        equality_nums.append(equality_num)
+    """Choose the team minimizing the objective, breaking ties by team size and then randomly."""
     # instead of argmin, we search for all teams minimizing the equality number.
     # For those, we then add the player to the one with the least players.
     min_indices = np.where(equality_nums == np.min(equality_nums))[0]
     if len(min_indices) > 1:
-        min_team_sizes = [teams[i].player_num for i in min_indices]
+        min_team_sizes = team_sizes[min_indices]
         min_team_indices = np.where(min_team_sizes == np.min(min_team_sizes))[0]
         if len(min_team_indices) > 1:
             np.random.seed(seed)  # For reproducibility
@@ -83,6 +110,64 @@ def find_best_team_to_join(
     return np.argmin(equality_nums)  # type: ignore
 
 
+def _get_sports_matrix(player_data: pd.DataFrame) -> np.ndarray:
+    """Whether each player (rows) attends each sport (columns) of the sports list."""
+    return player_data[SPORTS_LIST].fillna(False).to_numpy(dtype=bool).astype(np.int64)
+
+
+def _assign_players_to_teams(
+    player_data: pd.DataFrame, num_teams: int, seed: int
+) -> list[Team]:
+    """Greedily assign the players in the given order to the team that keeps the
+    teams most balanced, tracking the teams as a teams x sports count matrix."""
+    assignments = _get_team_assignments(
+        _get_sports_matrix(player_data), num_teams, seed
+    )
+    return [
+        Team.from_dataframe(i, player_data[assignments == i]) for i in range(num_teams)
+    ]
+
+
+def _get_team_assignments(
+    sports_matrix: np.ndarray, num_teams: int, seed: int
+) -> np.ndarray:
+    """The index of the team each player (row of the sports matrix) is greedily assigned to."""
+    counts = np.zeros((num_teams, len(SPORTS_LIST)), dtype=np.int64)
+    team_sizes = np.zeros(num_teams, dtype=np.int64)
+    assignments = np.zeros(len(sports_matrix), dtype=np.int64)
+    for i, player_sports in enumerate(sports_matrix):
+        if i == 0:
+            best_team_to_join = 0
+        else:
+            equality_nums = _get_candidate_objectives(counts, player_sports)
+            best_team_to_join = _choose_team_index(equality_nums, team_sizes, seed)
+        assignments[i] = best_team_to_join
+        counts[best_team_to_join] += player_sports
+        team_sizes[best_team_to_join] += 1
+    return assignments
+
+
+def find_best_team_to_join(
+    teams: list[Team], player: pd.Series, num_teams: int, seed: int
+) -> int:
+    """Find the best team to add the given player to."""
+    if all(team.player_num == 0 for team in teams):
+        return 0
+    counts = np.array(
+        [
+            [teams[i].current_sports_stats[sport] for sport in SPORTS_LIST]
+            for i in range(num_teams)
+        ],
+        dtype=np.int64,
+    )
+    player_sports = np.array(
+        [bool(player[sport]) for sport in SPORTS_LIST], dtype=np.int64
+    )
+    equality_nums = _get_candidate_objectives(counts, player_sports)
+    team_sizes = np.array([teams[i].player_num for i in range(num_teams)])
+    return _choose_team_index(equality_nums, team_sizes, seed)
+
+
 @deprecated("We have settled to not use random generation anymore")
 def create_teams_from_seed(
     num_teams: int = 3, seed: int | None = None, year=CURRENT_YEAR
@@ -95,13 +180,7 @@ def create_teams_from_seed(
         .sample(frac=1, random_state=seed)
         .reset_index(drop=True)
     )
-    teams = [Team(i) for i in range(num_teams)]
-    # I'm aware that this is not the most efficient way to do this, but it's the most readable
-    # and luckily the speed requirements are not that high.
-    for _, player in player_data.iterrows():
-        best_team_to_join = find_best_team_to_join(teams, player, num_teams, seed)
-        teams[best_team_to_join].add_player(player)
-    return teams
+    return _assign_players_to_teams(player_data, num_teams, seed)
 
 
 @deprecated("We have settled to not use random generation anymore")
@@ -119,11 +198,303 @@ def find_optimal_team_seed(num_teams: int = 3, num_tries: int = 100) -> int:
 
 def calculate_team_balance(teams: list[Team]) -> float:
     """Calculate the balance of the teams based on the number of players in each team."""
-    team_sizes = [team.player_num for team in teams]
+    counts = np.array(
+        [[team.current_sports_stats[sport] for sport in SPORTS_LIST] for team in teams]
+    )
+    return _get_team_balance(counts, np.array([team.player_num for team in teams]))
+
+
+def _get_team_balance(counts: np.ndarray, team_sizes: np.ndarray) -> float:
+    """The team balance (see `calculate_team_balance`) from the teams x sports count matrix."""
     equality_num: float = 0.0  # perfectly equal
-    if any(x != team_sizes[-1] for x in team_sizes):
+    if np.any(team_sizes != team_sizes[-1]):
         return 100  # Not even same sizes
-    for sport in SPORTS_LIST:
-        sports_stats = [team.current_sports_stats[sport] for team in teams]
-        equality_num += np.std(sports_stats, axis=0) / np.mean(sports_stats)
+    equality_num += float(_get_balance_objectives(counts))
     return equality_num
+
+
+_WORKER_STATE: dict = {}
+"""The player data shared by all restarts of a worker process."""
+
+
+@dataclass
+class TeamSearchResult:
+    """The outcome of a search over many randomized restarts of the team creation."""
+
+    teams: list[Team] = field(repr=False)
+    """The most balanced teams found."""
+
+    best_seed: int
+    """The seed of the restart that produced the best teams."""
+
+    best_objective: float
+    """The balance of the best teams, see `calculate_team_balance`."""
+
+    objectives: pd.Series = field(repr=False)
+    """The balance reached by each restart, indexed by its seed."""
+
+    def describe(self) -> pd.Series:
+        """Summary statistics of the distribution of objective values."""
+        return self.objectives.describe(percentiles=[0.01, 0.1, 0.5])
+
+
+def get_restart_seeds(base_seed: int, num_restarts: int) -> list[int]:
+    """The seeds of the restarts, derived reproducibly from the base seed."""
+    seed_seq = np.random.SeedSequence(base_seed)
+    return [int(seed) for seed in seed_seq.generate_state(num_restarts)]
+
+
+def get_restart_order(
+    num_sports: np.ndarray, seed: int, keep_sports_order: bool = True
+) -> np.ndarray:
+    """The order in which the players are assigned in the restart with the given seed.
+
+    If `keep_sports_order` is True, the players are still sorted by the number of
+    sports they attend (which works out best for the greedy assignment), and only
+    players attending the same number of sports are shuffled.
+    """
+    rng = np.random.default_rng(seed)
+    shuffled = rng.permutation(len(num_sports))
+    if not keep_sports_order:
+        return shuffled
+    return shuffled[np.argsort(-num_sports[shuffled], kind="stable")]
+
+
+def _init_worker(
+    sports_matrix: np.ndarray, num_sports: np.ndarray, keep_sports_order: bool
+):
+    _WORKER_STATE["sports_matrix"] = sports_matrix
+    _WORKER_STATE["num_sports"] = num_sports
+    _WORKER_STATE["keep_sports_order"] = keep_sports_order
+
+
+def _run_restart(args: tuple[int, int]) -> float:
+    seed, num_teams = args
+    order = get_restart_order(
+        _WORKER_STATE["num_sports"], seed, _WORKER_STATE["keep_sports_order"]
+    )
+    sports_matrix = _WORKER_STATE["sports_matrix"][order]
+    assignments = _get_team_assignments(sports_matrix, num_teams, seed)
+    counts = np.stack(
+        [sports_matrix[assignments == i].sum(axis=0) for i in range(num_teams)]
+    )
+    return _get_team_balance(counts, np.bincount(assignments, minlength=num_teams))
+
+
+def search_team_seeds(
+    num_teams: int = 3,
+    num_restarts: int = 1000,
+    base_seed: int = 42,
+    max_workers: int | None = None,
+    keep_sports_order: bool = True,
+    year: int = CURRENT_YEAR,
+) -> TeamSearchResult:
+    """Run the greedy team creation for many randomized player orders in parallel,
+    and return the most balanced teams.
+    The seed of each restart is derived from the base seed, so the result is
+    reproducible independent of the number of workers.
+
+    Parameters
+    ----------
+    num_teams : int, optional
+        The number of teams to create, by default 3
+    num_restarts : int, optional
+        The number of randomized restarts, by default 1000
+    base_seed : int, optional
+        The seed all restart seeds are derived from, by default 42
+    max_workers : int | None, optional
+        The number of worker processes, by default the number of CPUs.
+    keep_sports_order : bool, optional
+        Whether to only shuffle players attending the same number of sports,
+        by default True. Otherwise, the player order is fully random.
+    year : int, optional
+        The year to create the teams for, by default CURRENT_YEAR
+
+    Returns
+    -------
+    TeamSearchResult
+        The best teams and the objective values of all restarts.
+    """
+    player_data = load_team_player_data(year).reset_index(drop=True)
+    sports_matrix = _get_sports_matrix(player_data)
+    num_sports = player_data["num_sports"].to_numpy()
+    seeds = get_restart_seeds(base_seed, num_restarts)
+    LOGGER.info(
+        f"Searching {num_restarts} restarts for {num_teams} teams of {len(player_data)} players."
+    )
+    with ProcessPoolExecutor(
+        max_workers=max_workers,
+        initializer=_init_worker,
+        initargs=(sports_matrix, num_sports, keep_sports_order),
+    ) as executor:
+        objectives = list(
+            executor.map(
+                _run_restart,
+                [(seed, num_teams) for seed in seeds],
+                chunksize=max(1, num_restarts // 64),
+            )
+        )
+    objective_series = pd.Series(objectives, index=pd.Index(seeds, name="seed"))
+    # The first seed reaching the minimum, so that ties are resolved reproducibly
+    best_seed = int(objective_series.idxmin())
+    order = get_restart_order(num_sports, best_seed, keep_sports_order)
+    ordered_data = player_data.iloc[order]
+    assignments = _get_team_assignments(sports_matrix[order], num_teams, best_seed)
+    teams = [
+        Team.from_dataframe(i, ordered_data[assignments == i]) for i in range(num_teams)
+    ]
+    best_objective = calculate_team_balance(teams)
+    LOGGER.info(
+        f"Best balance {best_objective:.4f} (seed {best_seed}), median {objective_series.median():.4f}."
+    )
+    return TeamSearchResult(teams, best_seed, best_objective, objective_series)
+
+
+def _get_sport_terms(
+    sums: np.ndarray, sq_sums: np.ndarray, num_teams: int
+) -> np.ndarray:
+    """The relative standard deviation of each sport, with sports without players
+    (which no move can change) contributing zero."""
+    with np.errstate(divide="ignore", invalid="ignore"):
+        terms = np.sqrt(np.maximum(sq_sums * num_teams - sums**2, 0)) / sums
+    return np.where(sums > 0, terms, 0.0)
+
+
+def optimize_teams(
+    teams: list[Team],
+    time_budget: float = 10.0,
+    seed: int = 42,
+    max_iterations: int | None = None,
+    swap_probability: float = 0.7,
+    initial_temperature: float = 0.02,
+    final_temperature: float = 1e-4,
+) -> list[Team]:
+    """Improve the balance of the given teams by moving and swapping players between
+    them, using simulated annealing.
+
+    Each move or swap only changes the player counts of two teams, so its effect on
+    the balance objective (see `calculate_team_balance`) is evaluated in O(sports).
+    Single moves may only unbalance the team sizes by one player, and the returned
+    teams have sizes as equal as possible before being balanced by sport.
+    Late entries are kept in the team they are in.
+
+    Parameters
+    ----------
+    teams : list[Team]
+        The teams to optimize, e.g. the ones from `create_teams`. They are not modified.
+    time_budget : float, optional
+        The maximum run time in seconds, by default 10.0
+    seed : int, optional
+        The seed for choosing and accepting the moves, by default 42
+    max_iterations : int | None, optional
+        The maximum number of moves tried, by default unlimited. If the time budget
+        is not hit, the result is reproducible for a given seed.
+    swap_probability : float, optional
+        The probability of trying a swap instead of a single move, by default 0.7
+    initial_temperature : float, optional
+        The annealing temperature at the start, by default 0.02
+    final_temperature : float, optional
+        The annealing temperature at the end of the time budget (or the
+        iterations), by default 1e-4
+
+    Returns
+    -------
+    list[Team]
+        New teams with the best balance found.
+    """
+    num_teams = len(teams)
+    player_data = pd.concat(
+        [team.player_df.drop(columns="Team", errors="ignore") for team in teams],
+        ignore_index=True,
+    )
+    assignments = np.concatenate(
+        [np.full(team.player_num, i, dtype=np.int64) for i, team in enumerate(teams)]
+    )
+    sports_matrix = _get_sports_matrix(player_data)
+    late_entries = player_data.get(
+        "late_entry", pd.Series(False, index=player_data.index)
+    )
+    movable = np.flatnonzero(~late_entries.fillna(False).to_numpy(dtype=bool))
+    counts = np.stack(
+        [sports_matrix[assignments == i].sum(axis=0) for i in range(num_teams)]
+    )
+    team_sizes = np.bincount(assignments, minlength=num_teams)
+    target_spread = int(len(assignments) % num_teams != 0)
+    sums = counts.sum(axis=0)
+    sq_sums = np.square(counts).sum(axis=0)
+    objective = float(_get_sport_terms(sums, sq_sums, num_teams).sum())
+
+    def get_excess_spread(sizes: np.ndarray) -> int:
+        return max(int(sizes.max() - sizes.min()) - target_spread, 0)
+
+    # Equal team sizes take precedence over the balance of the sports
+    best_key = (get_excess_spread(team_sizes), objective)
+    best_assignments = assignments.copy()
+    rng = np.random.default_rng(seed)
+    start_time = time.perf_counter()
+    iteration = 0
+    num_accepted = 0
+    if len(movable) < 2 or num_teams < 2:
+        max_iterations = 0
+    while max_iterations is None or iteration < max_iterations:
+        elapsed = time.perf_counter() - start_time
+        if elapsed > time_budget:
+            break
+        progress = (
+            iteration / max_iterations
+            if max_iterations is not None
+            else elapsed / time_budget
+        )
+        temperature = initial_temperature * (
+            final_temperature / initial_temperature
+        ) ** min(progress, 1)
+        iteration += 1
+        player = movable[rng.integers(len(movable))]
+        team_a = assignments[player]
+        new_sizes = team_sizes
+        if rng.random() < swap_probability:
+            other = movable[rng.integers(len(movable))]
+            team_b = assignments[other]
+            if team_a == team_b:
+                continue
+            diff = sports_matrix[other] - sports_matrix[player]
+        else:
+            other = -1
+            team_b = (team_a + rng.integers(1, num_teams)) % num_teams
+            new_sizes = team_sizes.copy()
+            new_sizes[team_a] -= 1
+            new_sizes[team_b] += 1
+            max_spread = max(get_excess_spread(team_sizes) - 1, 1)
+            if get_excess_spread(new_sizes) > max_spread:
+                continue
+            diff = -sports_matrix[player]
+        # The change of sum(c^2) when team a gains diff and team b loses it
+        new_sq_sums = (
+            sq_sums + 2 * diff * (counts[team_a] - counts[team_b]) + 2 * diff**2
+        )
+        new_objective = float(_get_sport_terms(sums, new_sq_sums, num_teams).sum())
+        delta = new_objective - objective
+        if delta > 0 and rng.random() >= np.exp(-delta / temperature):
+            continue
+        num_accepted += 1
+        objective = new_objective
+        sq_sums = new_sq_sums
+        counts[team_a] += diff
+        counts[team_b] -= diff
+        team_sizes = new_sizes
+        assignments[player] = team_b
+        if other >= 0:
+            assignments[other] = team_a
+        key = (get_excess_spread(team_sizes), objective)
+        if key[0] < best_key[0] or (
+            key[0] == best_key[0] and key[1] < best_key[1] - 1e-12
+        ):
+            best_key = key
+            best_assignments = assignments.copy()
+    LOGGER.info(
+        f"Tried {iteration} moves in {time.perf_counter() - start_time:.1f} s ({num_accepted} accepted), best balance {best_key[1]:.4f}."
+    )
+    return [
+        Team.from_dataframe(team.team_index, player_data[best_assignments == i])
+        for i, team in enumerate(teams)
+    ]
@@ -1,3 +1,4 @@
+from .calendar_feed import get_calendar_feed
 from .display_organizers import st_display_organizers
 from .display_player_schedules import st_display_player_schedules
 from .display_results import *
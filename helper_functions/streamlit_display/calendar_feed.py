@@ -0,0 +1,105 @@
+"""The entries shown in the calendar of the schedule page, serialized once per
+state of the data files and sliced by day and sport before being sent to the widget."""
+
+from __future__ import annotations
+
+import hashlib
+from collections.abc import Collection
+from dataclasses import dataclass, field
+from datetime import date, datetime, time
+
+from ..constants import FpathRegistry
+from ..data_registry import DataRegistry
+
+
+@dataclass
+class CalendarFeed:
+    """All resources and events of the calendar for a given state of the data."""
+
+    content_hash: str
+    """Hash of the files the entries were built from, usable as a widget key."""
+
+    resources: list[dict[str, str]] = field(repr=False)
+    """The rows of the calendar, one for each sport and one for the awards."""
+
+    events: list[dict] = field(repr=False)
+    """The general timeline of each sport, the award ceremony, and all matches."""
+
+    _event_days: list[date] = field(repr=False)
+    _event_resources: list[str] = field(repr=False)
+
+    @classmethod
+    def from_data(cls, data: DataRegistry, content_hash: str = "") -> CalendarFeed:
+        sport_events = data.sport_events.values()
+        resources = [
+            {"id": event.identity_name, "title": event.icon} for event in sport_events
+        ]
+        resources.append({"id": "awards", "title": "🏆"})
+        events = [entry for event in sport_events for entry in event.calendar_entries]
+        events.append(
+            {
+                "title": "🏆 Award Ceremony at MPA Common Room",
+                "start": datetime.combine(data.end_date, time(21, 45)).isoformat(),
+                "end": datetime.combine(data.end_date, time(22, 00)).isoformat(),
+                "resourceId": "awards",
+                "color": "green",
+            }
+        )
+        events += [
+            entry for event in sport_events for entry in event.match_calendar_entries
+        ]
+        return cls(
+            content_hash,
+            resources,
+            events,
+            [datetime.fromisoformat(entry["start"]).date() for entry in events],
+            [entry["resourceId"] for entry in events],
+        )
+
+    def get_resources(
+        self, resource_ids: Collection[str] | None = None
+    ) -> list[dict[str, str]]:
+        """The resources, restricted to the given ids if provided."""
+        if resource_ids is None:
+            return self.resources
+        return [res for res in self.resources if res["id"] in resource_ids]
+
+    def get_events(
+        self, day: date | None = None, resource_ids: Collection[str] | None = None
+    ) -> list[dict]:
+        """The events, restricted to the given day and resource ids if provided."""
+        return [
+            entry
+            for entry, entry_day, resource in zip(
+                self.events, self._event_days, self._event_resources
+            )
+            if (day is None or entry_day == day)
+            and (resource_ids is None or resource in resource_ids)
+        ]
+
+
+_FEEDS: dict[int, CalendarFeed] = {}
+"""The latest calendar feed of each year."""
+
+
+def _get_content_hash(data: DataRegistry) -> str:
+    """Hash the modification times of the files the calendar entries are built from,
+    which is cheap and, unlike `hash`, stable across processes."""
+    fpaths = [
+        FpathRegistry.get_path_matches(data.year),
+        FpathRegistry.get_path_sport_events(data.year),
+        FpathRegistry.get_path_sports_organizers(data.year),
+    ]
+    mtimes = [fpath.stat().st_mtime_ns if fpath.exists() else -1 for fpath in fpaths]
+    content = f"{data.year}_{'_'.join(str(mtime) for mtime in mtimes)}"
+    return hashlib.sha1(content.encode()).hexdigest()[:16]
+
+
+def get_calendar_feed(data: DataRegistry) -> CalendarFeed:
+    """Get the calendar feed for the given data, rebuilt once its files have changed."""
+    content_hash = _get_content_hash(data)
+    feed = _FEEDS.get(data.year)
+    if feed is None or feed.content_hash != content_hash:
+        feed = CalendarFeed.from_data(data, content_hash)
+        _FEEDS[data.year] = feed
+    return feed
@@ -3,10 +3,15 @@ import streamlit as st
 
 from ..classes.match import Match
 from ..classes.player import Player
+from ..classes.player_index import PlayerIndex
 
 
 def st_display_player_schedules(
-    players: pd.DataFrame, key: str, matches: list[Match], schedule_only: bool = False
+    players: pd.DataFrame,
+    key: str,
+    matches: list[Match],
+    schedule_only: bool = False,
+    player_index: PlayerIndex | None = None,
 ):
     players = players.sort_values("nickname").fillna("")
     player_names = sorted(players["nickname"].tolist())
@@ -41,6 +46,8 @@ def st_display_player_schedules(
         else st.session_state[f"player_scroll_idx_{key}"]
     )
     player = Player.from_series(
-        players.iloc[st.session_state[f"player_scroll_idx_{key}"]], matches
+        players.iloc[st.session_state[f"player_scroll_idx_{key}"]],
+        matches,
+        player_index,
     )
     player.write_streamlit_rep(schedule_only=schedule_only)
@@ -9,27 +9,13 @@ from ..data_registry import DataRegistry
 
 def _calc_score_for_team(data: DataRegistry, team_letter: str, sport: str) -> float:
     assert sport in SPORTS_LIST
-    match_df = data.match_df
-    if sport == "running_sprints":
-        return data.get_running_sprints_score(team_letter)
-
-    sport_df = match_df[match_df["sport"] == sport].infer_objects(copy=False).fillna("")  # type: ignore
-    num_won = np.sum(sport_df["winner"] == team_letter)
-    num_tied = np.sum(
-        sport_df["winner"].apply(lambda x: len(x) > 1 and team_letter in x)
-    )
-    return num_won + 0.5 * num_tied
+    return data.score_board.get_team_score(team_letter, sport)
 
 
 def _get_full_score_df(data: DataRegistry) -> pd.DataFrame:
-    sport_nums = {
-        sport: [
-            _calc_score_for_team(data, team.team_letter, sport) for team in data.teams
-        ]
-        for sport in data.avail_sports
-    }
-    sport_nums["Team"] = [team.team_letter for team in data.teams]  # type: ignore
-    df = pd.DataFrame(sport_nums).set_index("Team")
+    board = data.score_board
+    df = board.team_scores[data.avail_sports].copy()
+    df.index.name = "Team"
     for i, sport in enumerate(data.avail_sports):
         event = data.sport_events[sport]
         result_perc = (
@@ -37,8 +23,7 @@ def _get_full_score_df(data: DataRegistry) -> pd.DataFrame:
             if df[sport].sum() != 0
             else 0
         )
-        event_matches = event.match_df.infer_objects(copy=False).fillna("")  # type: ignore
-        num_tot, num_done = len(event_matches), np.sum(event_matches["winner"] != "")
+        num_tot, num_done = board.match_progress.loc[sport]
         symbol = "✔️" if num_tot == num_done else ""
         colname = f"{event.icon} ({num_done}/{num_tot}{symbol}) x {event.point_weight_factor:.1f}"
         if sport == "running_sprints":
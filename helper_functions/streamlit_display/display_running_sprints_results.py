@@ -36,7 +36,9 @@ def calculate_points(df: pd.DataFrame) -> dict[str, float]:
 def display_sprints_df(df: pd.DataFrame, data: DataRegistry):
     """Style the match dataframe and display it properly."""
     df["Place"] = df["time"].rank(method="min").astype(int)
-    df["avatar"] = df["nickname"].apply(lambda x: FpathRegistry.get_animal_pic_path(x))
+    df["avatar"] = df["nickname"].apply(
+        lambda x: FpathRegistry.get_animal_pic_path(x, variant="table")
+    )
     df = df.sort_values("Place")
     column_configs = {}
     column_configs["time"] = st.column_config.Column("Time", width="small")
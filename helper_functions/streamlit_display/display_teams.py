@@ -31,4 +31,9 @@ def st_display_team_overview(data: DataRegistry):
 
             if data.year != CURRENT_YEAR:
                 continue
-            st_display_player_schedules(team.player_df, team.name, data.matches)
+            st_display_player_schedules(
+                team.player_df,
+                team.name,
+                data.matches,
+                player_index=data.player_index,
+            )
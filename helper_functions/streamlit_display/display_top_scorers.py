@@ -1,47 +1,30 @@
 ###################################################################
 ### INDIVIDUAL TOP SCORERS
 
+import numpy as np
 import pandas as pd
 import streamlit as st
 
 from ..constants import SPORTS_LIST, FpathRegistry
 from ..data_registry import DataRegistry
-from ..util import register_or_add_to_dict
 from .streamlit_util import st_style_df_with_team_vals
 
 
 def _get_individual_score_df(
     data: DataRegistry, num_to_cut_to: int = 10
 ) -> pd.DataFrame:
-    winner_dict: dict[str, float] = dict()
-    for match in data.matches:
-        win_val = data.sport_events[match.sport].single_match_win_value
-        for win_player in match.winning_players:
-            register_or_add_to_dict(winner_dict, win_player, win_val)
-        for tie_player in match.tying_players:
-            register_or_add_to_dict(winner_dict, tie_player, win_val / 2)
-
-    for team_letter in data.team_letters:
-        win_val = (
-            data.get_running_sprints_score(team_letter)
-            / data.sport_events["running_sprints"].num_players_per_subteam
-        )
-        for player in data.subteams[f"running_sprints_{team_letter}1"].players:
-            register_or_add_to_dict(winner_dict, player, win_val)
-
+    player_scores = data.score_board.player_scores
     players: pd.DataFrame = data.players.infer_objects(True).fillna("")  # type: ignore
-    players["Score_num"] = players["nickname"].apply(lambda x: winner_dict.get(x, 0))
-    players["Sports"] = players.apply(
-        lambda x: [
-            sport
-            for sport in SPORTS_LIST
-            if x.get(f"subteam_{sport}", "") not in ["", "R"]
-        ],
-        axis=1,
-    )
-    players["Sports"] = players["Sports"].apply(
-        lambda sports: " ".join([data.sport_events[s].icon for s in sports])
-    )
+    players["Score_num"] = players["nickname"].map(player_scores).fillna(0)
+    sports_icons = np.full(len(players), "", dtype=object)
+    for sport in SPORTS_LIST:
+        if f"subteam_{sport}" not in players.columns:
+            continue
+        attends = ~players[f"subteam_{sport}"].isin(["", "R"]).to_numpy()
+        if attends.any():
+            icon = data.sport_events[sport].icon
+            sports_icons[attends] = sports_icons[attends] + " " + icon
+    players["Sports"] = [icons.removeprefix(" ") for icons in sports_icons]
     players["Team"] = players["Team"].str.replace("Team ", "")
     top_ten = (
         players[["nickname", "Team", "Score_num", "Sports"]]
@@ -50,7 +33,9 @@ def _get_individual_score_df(
         .reset_index(drop=True)
     )
     top_ten.insert(0, "Place", range(1, num_to_cut_to + 1))
-    top_ten["avatar"] = top_ten["nickname"].apply(FpathRegistry.get_animal_pic_path)
+    top_ten["avatar"] = top_ten["nickname"].apply(
+        lambda x: FpathRegistry.get_animal_pic_path(x, variant="table")
+    )
     top_ten["Score"] = top_ten["Score_num"].apply(lambda x: f"{x:.1f}")
     # We only want to reveal the top ten
     return top_ten.rename(columns={"nickname": "Nickname"})
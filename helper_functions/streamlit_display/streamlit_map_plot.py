@@ -1,3 +1,5 @@
+import functools
+
 import pandas as pd
 import pydeck as pdk
 import streamlit as st
@@ -8,26 +10,40 @@ from ..util import turn_series_list_to_dataframe
 MAP_OPTIONS = ["streets", "satellite", "outdoors"]
 
 
-def create_map_plot(highlighted_locations: list[str], start_zoomed_out: bool = False):
-    """Create a map plot with highlighted locations."""
+# Define a tooltip for the layers
+_TOOLTIP = {
+    "html": "<b>{description}</b>",
+    "style": {
+        "backgroundColor": "black",
+        "color": "white",
+        "padding": "12px",
+        "border": "1px",
+        "border-radius": "5px",
+        "width": "200px",
+    },
+}
+
+
+class _SerializedDeck(pdk.Deck):
+    """Deck that only serializes itself once, as the memoized decks are never changed."""
 
-    df = turn_series_list_to_dataframe(
+    def to_json(self) -> str:
+        if not hasattr(self, "_json"):
+            self._json = super().to_json()
+        return self._json
+
+
+@functools.cache
+def _get_location_df() -> pd.DataFrame:
+    return turn_series_list_to_dataframe(
         [loc.as_series for loc in ALL_LOCATIONS.values()]
     )
 
-    highlight_df = df[df["name"].isin(highlighted_locations)]
-    # Define a tooltip for the layers
-    tooltip = {
-        "html": "<b>{description}</b>",
-        "style": {
-            "backgroundColor": "black",
-            "color": "white",
-            "padding": "12px",
-            "border": "1px",
-            "border-radius": "5px",
-            "width": "200px",
-        },
-    }
+
+@functools.cache
+def _get_static_layers() -> dict[str, pdk.Layer]:
+    """The layers that do not depend on the highlighted locations."""
+    df = _get_location_df()
     mpe_entrance = (48.261778, 11.671638, "MPE Entrance", "Entrance to MPE")
     mpa_entrance = (48.260992, 11.671281, "MPA Entrance", "Entrance to MPA")
 
@@ -35,8 +51,7 @@ def create_map_plot(highlighted_locations: list[str], start_zoomed_out: bool = F
         [mpe_entrance, mpa_entrance],
         columns=["latitude", "longitude", "display_name", "desc"],
     )
-
-    LAYERS = {
+    return {
         "All locations": pdk.Layer(
             "ScatterplotLayer",
             data=df,
@@ -45,14 +60,6 @@ def create_map_plot(highlighted_locations: list[str], start_zoomed_out: bool = F
             get_radius=20,
             radius_scale=0.1,
         ),
-        "Highlighted locations": pdk.Layer(
-            "ScatterplotLayer",
-            data=highlight_df,
-            get_position=["longitude", "latitude"],
-            get_color=[200, 0, 0, 200],
-            get_radius=100,
-            radius_scale=0.1,
-        ),
         "Extra locations": pdk.Layer(
             "ScatterplotLayer",
             data=extra_df,
@@ -73,7 +80,7 @@ def create_map_plot(highlighted_locations: list[str], start_zoomed_out: bool = F
             get_font_weight=700,  # Set the font weight of the text
             pickable=True,  # Make the layer clickable
             auto_highlight=True,  # Highlight the layer when it's clicked
-            tooltip=tooltip,  # Use the tooltip
+            tooltip=_TOOLTIP,  # Use the tooltip
         ),
         "Extra annotations": pdk.Layer(
             "TextLayer",
@@ -85,13 +92,25 @@ def create_map_plot(highlighted_locations: list[str], start_zoomed_out: bool = F
             get_alignment_baseline="'bottom'",
             pickable=True,  # Make the layer clickable
             # auto_highlight=True,  # Highlight the layer when it's clicked
-            tooltip=tooltip,  # Use the tooltip
+            tooltip=_TOOLTIP,  # Use the tooltip
         ),
     }
 
-    style = st.radio("Map style", MAP_OPTIONS, horizontal=True)
-    if style is None:
-        style = "streets"
+
+@functools.lru_cache(maxsize=64)
+def _get_deck(
+    highlighted_locations: tuple[str, ...], start_zoomed_out: bool, style: str
+) -> pdk.Deck:
+    df = _get_location_df()
+    layers = _get_static_layers()
+    highlight_layer = pdk.Layer(
+        "ScatterplotLayer",
+        data=df[df["name"].isin(highlighted_locations)],
+        get_position=["longitude", "latitude"],
+        get_color=[200, 0, 0, 200],
+        get_radius=100,
+        radius_scale=0.1,
+    )
     initial_lat = 48.261925
     initial_long = 11.670458
     initial_zoom = 15
@@ -99,17 +118,31 @@ def create_map_plot(highlighted_locations: list[str], start_zoomed_out: bool = F
         initial_lat = 48.255925
         initial_long = 11.673458
         initial_zoom = 13
-    st.pydeck_chart(
-        pdk.Deck(
-            map_style=f"mapbox://styles/mapbox/{style}-v9",
-            initial_view_state=pdk.ViewState(
-                latitude=initial_lat,
-                longitude=initial_long,
-                zoom=initial_zoom,
-                min_zoom=10,
-                max_zoom=20,
-            ),
-            layers=list(LAYERS.values()),
-            tooltip=tooltip,  # type: ignore
-        )
+    return _SerializedDeck(
+        map_style=f"mapbox://styles/mapbox/{style}-v9",
+        initial_view_state=pdk.ViewState(
+            latitude=initial_lat,
+            longitude=initial_long,
+            zoom=initial_zoom,
+            min_zoom=10,
+            max_zoom=20,
+        ),
+        layers=[
+            layers["All locations"],
+            highlight_layer,
+            layers["Extra locations"],
+            layers["Annotations"],
+            layers["Extra annotations"],
+        ],
+        tooltip=_TOOLTIP,  # type: ignore
     )
+
+
+@st.fragment
+def create_map_plot(highlighted_locations: list[str], start_zoomed_out: bool = False):
+    """Create a map plot with highlighted locations.
+    It is run as a fragment, so changing the map style only reruns the map itself."""
+    style = st.radio("Map style", MAP_OPTIONS, horizontal=True)
+    if style is None:
+        style = "streets"
+    st.pydeck_chart(_get_deck(tuple(highlighted_locations), start_zoomed_out, style))
@@ -24,6 +24,60 @@ def _get_row_color(data: DataRegistry, row_val: str, alpha: float = 0.3) -> str:
     return ""
 
 
+_TEAM_CSS_CACHE: dict[tuple, dict[str, str]] = {}
+"""The team letter to css lookup for each set of teams and alpha value."""
+
+
+def _get_team_css(data: DataRegistry, alpha: float = 0.3) -> dict[str, str]:
+    """The css for each team letter of the registry, in the order of the teams."""
+    teams = tuple((team.team_letter, team.rgb_colors) for team in data.teams)
+    key = (data.year, teams, alpha)
+    if key not in _TEAM_CSS_CACHE:
+        _TEAM_CSS_CACHE[key] = {
+            letter: f"background-color: rgba({rgb[0]}, {rgb[1]}, {rgb[2]}, {alpha})"
+            for letter, rgb in teams
+        }
+    return _TEAM_CSS_CACHE[key]
+
+
+def _get_cell_colors(
+    cells: pd.Series, team_css: dict[str, str], alpha: float = 0.3
+) -> np.ndarray:
+    """Vectorized version of `_get_row_color` for a series of strings."""
+    values = cells.str
+    colors = np.full(len(cells), "", dtype=object)
+    colors[values.fullmatch("AB|BC|AC").to_numpy()] = (
+        f"background-color: rgba(255, 255, 50, {alpha})"
+    )
+    # Go through the teams backwards so that the first matching team takes precedence
+    for letter, css in reversed(team_css.items()):
+        mask = values.contains(f"{letter}: ", regex=False) | (cells == letter)
+        colors[mask.to_numpy()] = css
+    colors[values.contains("DROPOUT", regex=False).to_numpy()] = (
+        f"background-color: rgba(0, 0, 0, {alpha})"
+    )
+    return colors
+
+
+def _get_style_css(
+    df: pd.DataFrame, data: DataRegistry, full_row: bool = False
+) -> pd.DataFrame:
+    """Get the css for each cell of the dataframe."""
+    relevant = df[["full_key"]] if full_row else df
+    # Classify all cells at once, with any non-string cells left uncolored
+    cells = pd.Series(relevant.to_numpy(dtype=object).ravel())
+    cells = cells.where(cells.map(type).eq(str), "")
+    team_css = _get_team_css(data)
+    # Many cells share the same value, so only the unique values are classified
+    codes, uniques = pd.factorize(cells)
+    colors = _get_cell_colors(pd.Series(uniques), team_css)[codes]
+    if full_row:
+        css_values = np.repeat(colors[:, np.newaxis], len(df.columns), axis=1)
+    else:
+        css_values = colors.reshape(df.shape)
+    return pd.DataFrame(css_values, index=df.index, columns=df.columns)
+
+
 def st_style_df_with_team_vals(
     df: pd.DataFrame, data: DataRegistry, full_row=False
 ) -> Styler:
@@ -37,16 +91,8 @@ def st_style_df_with_team_vals(
         If True, the whole row will be colored, otherwise format each entry individually, by default False.
     """
     # We need to hide the index column, this only works if we convert to HTML
-    style = df.style
-    if full_row:
-        style = style.apply(
-            lambda row: [_get_row_color(data, row["full_key"])] * len(row), axis=1  # type: ignore
-        )
-    else:
-        style = style.apply(
-            lambda row: [_get_row_color(data, val) for val in row], axis=1
-        )
-    return style
+    css = _get_style_css(df, data, full_row)
+    return df.style.apply(lambda _: css, axis=None)
 
 
 def _get_val_color(val: str) -> str:
@@ -1,4 +1,4 @@
-from datetime import datetime, time, timedelta
+from datetime import timedelta
 
 import streamlit as st
 from streamlit_calendar import calendar
@@ -7,14 +7,35 @@ import helper_functions as hf
 
 st.write(f"# Sports Schedule {hf.CURRENT_YEAR}")
 
-sports_resources = [
-    {"id": event.identity_name, "title": event.icon}
+calendar_feed = hf.get_calendar_feed(hf.DATA_NOW)
+
+day_options = {"Whole week": None} | {
+    day.strftime("%A"): day for day in hf.DATA_NOW.days
+}
+cols = st.columns([2, 3])
+with cols[0]:
+    day_name = st.segmented_control(
+        "Day", list(day_options), default="Whole week", key="schedule_day"
+    )
+selected_day = day_options.get(day_name or "Whole week")
+sport_options = {
+    event.icon + " " + event.name: event.identity_name
     for event in hf.DATA_NOW.sport_events.values()
-]
-sports_resources.append({"id": "awards", "title": "🏆"})
+}
+with cols[1]:
+    selected_sports = st.multiselect(
+        "Sports", list(sport_options), placeholder="All sports", key="schedule_sports"
+    )
+resource_ids = None
+if len(selected_sports) > 0:
+    resource_ids = [sport_options[sport] for sport in selected_sports]
+    resource_ids.append("awards")
 
 # The calendar needs an extra day for the date range.
-date_range = (hf.DATA_NOW.start_date, hf.DATA_NOW.end_date + timedelta(days=1))
+if selected_day is None:
+    date_range = (hf.DATA_NOW.start_date, hf.DATA_NOW.end_date + timedelta(days=1))
+else:
+    date_range = (selected_day, selected_day + timedelta(days=1))
 
 calendar_options = {
     "editable": "false",
@@ -24,40 +45,23 @@ calendar_options = {
         "center": "title",
         "right": "resourceTimelineDay,resourceTimelineWeek",
     },
-    "initialDate": hf.DATA_NOW.start_date.strftime("%Y-%m-%d"),
+    "initialDate": date_range[0].strftime("%Y-%m-%d"),
     "validRange": {
         "start": date_range[0].strftime("%Y-%m-%d"),
         "end": date_range[1].strftime("%Y-%m-%d"),
     },
     "slotMinTime": "17:30:00",
     "slotMaxTime": "21:30:00",
-    "initialView": "resourceTimeline",
-    "resources": sports_resources,
+    "initialView": (
+        "resourceTimeline" if selected_day is None else "resourceTimelineDay"
+    ),
+    "resources": calendar_feed.get_resources(resource_ids),
     "resourceAreaWidth": "10%",
     "resourceLabel": "test",
     "height": "1000px",
 }
 
-calendar_events = [
-    entry
-    for event in hf.DATA_NOW.sport_events.values()
-    for entry in event.calendar_entries
-]
-
-award_event = {
-    "title": "🏆 Award Ceremony at MPA Common Room",
-    "start": datetime.combine(hf.DATA_NOW.end_date, time(21, 45)).isoformat(),
-    "end": datetime.combine(hf.DATA_NOW.end_date, time(22, 00)).isoformat(),
-    "resourceId": "awards",
-    "color": "green",
-}
-calendar_events.append(award_event)  # type: ignore
-
-calendar_events += [
-    entry
-    for event in hf.DATA_NOW.sport_events.values()
-    for entry in event.match_calendar_entries
-]
+calendar_events = calendar_feed.get_events(selected_day, resource_ids)
 if hf.DATA_NOW.has_teams:
     st.write(
         "Go to the individual sports' pages for more detailed information on the schedules (and, if available, also results)."
@@ -71,6 +75,8 @@ my_calendar = calendar(
     options=calendar_options,
     # custom_css=custom_css,
     callbacks=["eventClick"],
+    # Only re-mount the calendar if its content or the visible window changes
+    key=f"calendar_{calendar_feed.content_hash}_{selected_day}_{resource_ids}",
 )
 if "eventClick" in my_calendar:
     try:
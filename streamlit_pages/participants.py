@@ -93,7 +93,15 @@ with tabs[0]:
         "institute",
     ] + [e.sanitized_name for e in hf.DATA_NOW.sport_events.values()]
     df = hf.DATA_NOW.players[cols]
-    df.insert(0, "impath", df["nickname"].apply(hf.FpathRegistry.get_animal_pic_path))
+    df.insert(
+        0,
+        "impath",
+        df["nickname"].apply(
+            lambda x: hf.FpathRegistry.get_animal_pic_path(
+                x, variant="table", inline=True
+            )
+        ),
+    )
 
     df = df.fillna("").sort_values("nickname")
     df["nickname"] = df["nickname"].apply(
@@ -132,5 +140,9 @@ with tabs[2]:
         "Select the player you want to see the schedule for. Typing a name in is supported."
     )
     hf.st_display_player_schedules(
-        hf.DATA_NOW.players, "full", hf.DATA_NOW.matches, schedule_only=True
+        hf.DATA_NOW.players,
+        "full",
+        hf.DATA_NOW.matches,
+        schedule_only=True,
+        player_index=hf.DATA_NOW.player_index,
     )